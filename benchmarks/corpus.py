@@ -0,0 +1,154 @@
+"""
+Benchmark corpora.
+
+Generates realistic data trees to convert: tmLanguage like pattern trees,
+tmTheme like color tables, wide arrays, deeply nested trees, and binary
+blobs. Each generator takes a rough size in bytes and is deterministic so
+that runs can be compared with each other.
+"""
+import collections
+import random
+
+OrderedDict = collections.OrderedDict
+
+# Nesting depth of the deep corpus (the YAML writer is recursive and runs out of stack around 200 levels)
+DEEP_DEPTH = 100
+
+SIZES = collections.OrderedDict([
+    ("small", 64 * 1024),
+    ("medium", 1024 * 1024),
+    ("large", 8 * 1024 * 1024)
+])
+
+WORDS = (
+    "if", "else", "elif", "for", "while", "return", "class", "def", "import", "from",
+    "try", "except", "finally", "with", "yield", "lambda", "pass", "break", "continue"
+)
+SCOPES = (
+    "keyword.control", "keyword.operator", "entity.name.function", "entity.name.class",
+    "string.quoted.double", "string.quoted.single", "comment.line", "comment.block",
+    "constant.numeric", "constant.language", "variable.parameter", "storage.type",
+    "punctuation.definition.string.begin", "punctuation.definition.string.end"
+)
+
+
+def tmlanguage(size):
+    """Generate a tmLanguage like tree: regular expression patterns with captures, and a repository."""
+
+    rand = random.Random(size)
+    # Each pattern is roughly 400 bytes once serialized.
+    count = max(1, size // 400)
+
+    def pattern(i):
+        words = "|".join(rand.sample(WORDS, 4))
+        scope = "%s.test" % rand.choice(SCOPES)
+        if i % 3:
+            return OrderedDict([
+                ("match", "(?x)\\b(%s)\\b\\s*(\\()?(?=[^\\t]*\\))" % words),
+                ("name", scope),
+                ("captures", OrderedDict([
+                    ("1", OrderedDict([("name", scope)])),
+                    ("2", OrderedDict([("name", "punctuation.section.test")]))
+                ]))
+            ])
+        return OrderedDict([
+            ("begin", "(\"|')"),
+            ("end", "(\\1)"),
+            ("name", scope),
+            ("comment", "Pattern %d\n\twith a multi-line comment" % i),
+            ("patterns", [OrderedDict([("include", "#escapes")]), OrderedDict([("match", "\\\\.")])])
+        ])
+
+    repository = OrderedDict(
+        ("rule%d" % i, OrderedDict([("patterns", [pattern(i)])])) for i in range(count // 2)
+    )
+    return OrderedDict([
+        ("name", "Benchmark"),
+        ("scopeName", "source.benchmark"),
+        ("fileTypes", ["bench", "benchmark"]),
+        ("uuid", "E3BADC20-6B0E-11D9-9DC9-000D93589AF6"),
+        ("patterns", [pattern(i) for i in range(count - count // 2)]),
+        ("repository", repository)
+    ])
+
+
+def tmtheme(size):
+    """Generate a tmTheme like tree: a long table of scope colors."""
+
+    rand = random.Random(size)
+    # Each entry is roughly 250 bytes once serialized.
+    settings = [
+        OrderedDict([("settings", OrderedDict([
+            ("background", "#272822"), ("foreground", "#F8F8F2"), ("caret", "#F8F8F0"), ("selection", "#49483E")
+        ]))])
+    ]
+    for i in range(max(1, size // 250)):
+        style = OrderedDict([("foreground", "#%06X" % rand.randrange(0x1000000))])
+        if i % 4 == 0:
+            style["fontStyle"] = rand.choice(("bold", "italic", "underline", ""))
+        settings.append(OrderedDict([
+            ("name", "Rule %d" % i),
+            ("scope", ", ".join("%s.test" % s for s in rand.sample(SCOPES, 2))),
+            ("settings", style)
+        ]))
+    return OrderedDict([
+        ("name", "Benchmark"),
+        ("settings", settings),
+        ("uuid", "D8D5E82E-3D5B-46B5-B38E-8C841C21347D")
+    ])
+
+
+def wide(size):
+    """Generate a wide array of mixed scalars."""
+
+    rand = random.Random(size)
+    # Each item is roughly 20 bytes once serialized.
+    items = []
+    for i in range(max(1, size // 20)):
+        kind = i % 4
+        if kind == 0:
+            items.append(rand.randrange(-1000000, 1000000))
+        elif kind == 1:
+            items.append(rand.random() * 1000)
+        elif kind == 2:
+            items.append("item %d" % i)
+        else:
+            items.append(bool(i % 3))
+    return OrderedDict([("items", items)])
+
+
+def deep(size):
+    """Generate trees nested `DEEP_DEPTH` levels deep."""
+
+    # Indentation dominates: each tree is roughly 240 KB once serialized as indented JSON.
+    roots = []
+    for n in range(max(1, size // (240 * 1024))):
+        root = node = OrderedDict()
+        for i in range(DEEP_DEPTH):
+            child = OrderedDict([("name", "level %d" % i), ("index", i)])
+            node["child"] = [child]
+            node = child
+        roots.append(root)
+    return OrderedDict([("trees", roots)])
+
+
+def binary(size):
+    """Generate a table of binary blobs."""
+
+    rand = random.Random(size)
+    # Each blob is 4 KB.
+    return OrderedDict([
+        ("blobs", [
+            OrderedDict([("name", "blob %d" % i), ("data", rand.randbytes(4096))])
+            for i in range(max(1, size // 4096))
+        ])
+    ])
+
+
+CORPORA = collections.OrderedDict([
+    ("tmlanguage", tmlanguage),
+    ("tmtheme", tmtheme),
+    ("wide", wide),
+    ("deep", deep),
+    ("binary", binary)
+])
@@ -0,0 +1,51 @@
+"""
+Benchmark output filename resolution.
+
+Compares the suffix index against the previous loop that built a
+regular expression for every entry of an extension table.
+
+    python -m benchmarks.ext_index --size 500
+"""
+import argparse
+import re
+import timeit
+from lib.extindex import SuffixIndex
+
+
+def regex_loop(table, filename):
+    """Previous per entry regular expression loop."""
+
+    for ext in table:
+        m = re.match("^(.*)\\." + re.escape(ext["json"]) + "$", filename, re.IGNORECASE)
+        if m is not None:
+            return m.group(1) + "." + ext["plist"]
+    return None
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description="Benchmark output filename resolution.")
+    parser.add_argument("--size", type=int, default=500, help="Number of entries in the extension table.")
+    parser.add_argument("--number", type=int, default=1000, help="Number of lookups per run.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs (best is reported).")
+    args = parser.parse_args()
+
+    table = [{"json": "ext%d.JSON" % i, "plist": "ext%d" % i} for i in range(args.size)]
+    index = SuffixIndex((ext["json"], ext["plist"]) for ext in table)
+    # Worst case for the loop: the last entry matches.
+    filename = "/some/path/file.ext%d.JSON" % (args.size - 1)
+    m = index.match(filename)
+    assert m[0] + "." + m[1] == regex_loop(table, filename)
+
+    print("%d table entries, %d lookups:" % (args.size, args.number))
+    results = []
+    for name, fn in (("regex loop", lambda: regex_loop(table, filename)), ("index", lambda: index.match(filename))):
+        best = min(timeit.repeat(fn, number=args.number, repeat=args.repeat))
+        results.append(best)
+        print("    %-12s %8.4f s" % (name, best))
+    print("    speedup: %.2fx" % (results[0] / results[1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark writing converted output to a file.
+
+Compares streaming output straight to the file against building the whole
+document in memory first and then writing it.
+
+    python -m benchmarks.file_write --size 8 --format yaml
+"""
+import argparse
+import os
+import tempfile
+import timeit
+import tracemalloc
+from lib import converter
+from lib import fileio
+from benchmarks.json_sanitize import make_json
+
+
+def in_memory(obj, fmt, filename):
+    """Build the whole output and then write it."""
+
+    fileio.write_file(filename, converter.dumps(obj, fmt))
+
+
+def streamed(obj, fmt, filename):
+    """Stream the output to the file."""
+
+    fileio.write_stream(filename, lambda f: converter.dump(obj, fmt, f))
+
+
+def peak(fn, *args):
+    """Get the peak memory allocated while running `fn`."""
+
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description="Benchmark writing converted output to a file.")
+    parser.add_argument("--size", type=float, default=8, help="Source JSON size in MB.")
+    parser.add_argument(
+        "--format", action="append", choices=converter.FORMATS, help="Target format (default: all formats)."
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs (best is reported).")
+    args = parser.parse_args()
+
+    obj = converter.loads(make_json(int(args.size * 1024 * 1024), False), 'json')
+    directory = tempfile.mkdtemp()
+    filename = os.path.join(directory, 'output')
+    try:
+        for fmt in args.format or converter.FORMATS:
+            streamed(obj, fmt, filename)
+            print("%s, %.2f MB of output:" % (fmt, os.path.getsize(filename) / 1024 / 1024))
+            for name, fn in (("in memory", in_memory), ("streamed", streamed)):
+                best = min(timeit.repeat(lambda: fn(obj, fmt, filename), number=1, repeat=args.repeat))
+                print(
+                    "    %-10s %8.3f s  peak %8.2f MB" % (name, best, peak(fn, obj, fmt, filename) / 1024 / 1024)
+                )
+    finally:
+        os.remove(filename)
+        os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
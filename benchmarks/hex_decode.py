@@ -0,0 +1,76 @@
+"""
+Benchmark decoding of Sublime hex view text to bytes.
+
+Compares the bulk, chunked `convert_from_hex` against the previous
+byte at a time decoder.
+
+    python -m benchmarks.hex_decode --size 4
+"""
+import argparse
+import os
+import timeit
+import tracemalloc
+from lib.plist_includes import convert_from_hex
+
+
+def per_byte(text):
+    """Previous byte at a time decoder."""
+
+    text = text.replace(' ', '').replace('\n', '')
+    byte = []
+    offset = 0
+    for x in range(0, int(len(text) / 2)):
+        byte.append(int(text[x + offset:x + offset + 2], 16))
+        offset += 1
+    return bytes(byte)
+
+
+def chunked(text, size=1024 * 1024):
+    """Decode the text in chunks like a hex view is read."""
+
+    return convert_from_hex(text[i:i + size] for i in range(0, len(text), size))
+
+
+def make_hex_view(size):
+    """Generate hex view text for `size` random bytes."""
+
+    data = os.urandom(size)
+    text = '\n'.join(data[i:i + 16].hex(' ', -2) for i in range(0, size, 16))
+    return data, text
+
+
+def peak(fn, text):
+    """Get the peak memory allocated while running `fn`."""
+
+    tracemalloc.start()
+    fn(text)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description="Benchmark hex view decoding.")
+    parser.add_argument("--size", type=float, default=4, help="Output size in MB.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs (best is reported).")
+    args = parser.parse_args()
+
+    data, text = make_hex_view(int(args.size * 1024 * 1024))
+    assert chunked(text) == data
+    print("%.2f MB of bytes (%.2f MB of hex view text):" % (len(data) / 1024 / 1024, len(text) / 1024 / 1024))
+    results = []
+    for name, fn in (("per byte", per_byte), ("bulk", convert_from_hex), ("bulk chunked", chunked)):
+        best = min(timeit.repeat(lambda: fn(text), number=1, repeat=args.repeat))
+        results.append(best)
+        print(
+            "    %-14s %8.3f s  %8.2f MB/s  peak %8.2f MB" % (
+                name, best, len(data) / 1024 / 1024 / best, peak(fn, text) / 1024 / 1024
+            )
+        )
+    print("    speedup: %.2fx" % (results[0] / results[2]))
+
+
+if __name__ == "__main__":
+    main()
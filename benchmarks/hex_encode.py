@@ -0,0 +1,58 @@
+"""
+Benchmark formatting of bytes as Sublime hex view text.
+
+Compares the bulk, chunked `convert_to_hex` against the previous
+byte at a time formatter.
+
+    python -m benchmarks.hex_encode --size 4
+"""
+import argparse
+import os
+import timeit
+from lib.plist_includes import convert_to_hex
+
+
+def per_byte(data):
+    """Previous byte at a time formatter."""
+
+    bin_output = []
+    count = 0
+    for b in data:
+        if count % 16 == 0 and count != 0:
+            bin_output += ['\n', "%02x" % b]
+        else:
+            if count % 2 == 0 and count != 0:
+                bin_output += [' ', "%02x" % b]
+            else:
+                bin_output.append("%02x" % b)
+        count += 1
+    return ''.join(bin_output)
+
+
+def bulk(data):
+    """Format with the bulk formatter."""
+
+    return ''.join(convert_to_hex(data))
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description="Benchmark hex view formatting.")
+    parser.add_argument("--size", type=float, default=4, help="Input size in MB.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs (best is reported).")
+    args = parser.parse_args()
+
+    data = os.urandom(int(args.size * 1024 * 1024))
+    assert bulk(data) == per_byte(data)
+    print("%.2f MB of bytes:" % (len(data) / 1024 / 1024))
+    results = []
+    for name, fn in (("per byte", per_byte), ("bulk", bulk)):
+        best = min(timeit.repeat(lambda: fn(data), number=1, repeat=args.repeat))
+        results.append(best)
+        print("    %-10s %8.3f s  %8.2f MB/s" % (name, best, len(data) / 1024 / 1024 / best))
+    print("    speedup: %.2fx" % (results[0] / results[1]))
+
+
+if __name__ == "__main__":
+    main()
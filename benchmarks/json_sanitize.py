@@ -0,0 +1,67 @@
+"""
+Benchmark JSON sanitizing.
+
+Compares the single pass `sanitize_json` against the previous two pass
+approach of stripping comments and then stripping dangling commas.
+
+    python -m benchmarks.json_sanitize --size 8
+"""
+import argparse
+import json
+import timeit
+from lib.file_strip.json import sanitize_json, strip_comments, strip_dangling_commas
+
+
+def two_pass(text, preserve_lines=False):
+    """Previous two pass sanitizer."""
+
+    return strip_dangling_commas(strip_comments(text, preserve_lines), preserve_lines)
+
+
+def make_json(size, dirty=False):
+    """Generate a tmLanguage like JSON document of roughly `size` bytes."""
+
+    patterns = []
+    pattern = {
+        "match": "\\b(if|else|for|while)\\b",
+        "name": "keyword.control.source",
+        "captures": {"1": {"name": "punctuation.definition, keyword"}}
+    }
+    chunk = len(json.dumps(pattern, indent=4)) + 6
+    for i in range(max(1, size // chunk)):
+        patterns.append(dict(pattern, comment="pattern %d // with slashes" % i))
+    text = json.dumps({"name": "Benchmark", "patterns": patterns}, indent=4)
+    if dirty:
+        # Sprinkle in comments and dangling commas.
+        text = text.replace('"\n', '", // comment\n').replace('}\n', '}, /* block */\n')
+    return text
+
+
+def bench(name, fn, text, repeat):
+    """Time `fn` and print throughput."""
+
+    best = min(timeit.repeat(lambda: fn(text, True), number=1, repeat=repeat))
+    print("    %-12s %8.3f s  %8.2f MB/s" % (name, best, len(text) / 1024 / 1024 / best))
+    return best
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description="Benchmark JSON sanitizing.")
+    parser.add_argument("--size", type=float, default=8, help="Approximate input size in MB.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs (best is reported).")
+    args = parser.parse_args()
+
+    size = int(args.size * 1024 * 1024)
+    for label, dirty in (("strict", False), ("comments and dangling commas", True)):
+        text = make_json(size, dirty)
+        assert json.loads(sanitize_json(text, True)) == json.loads(two_pass(text, True))
+        print("%s (%.2f MB):" % (label, len(text) / 1024 / 1024))
+        old = bench("two pass", two_pass, text, args.repeat)
+        new = bench("single pass", sanitize_json, text, args.repeat)
+        print("    speedup: %.2fx" % (old / new))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Benchmark every conversion direction.
+
+Converts each corpus (see `benchmarks.corpus`) at each size in all twelve
+directions the conversion commands support, using the same conversion core
+and default options as the commands (the core does not need the `sublime`
+module). For each run the parse, dump (to a string), and save (streamed to
+a file) stages are timed, and throughput and peak memory are reported.
+
+Results can be saved as a baseline and later runs compared against it:
+
+    python -m benchmarks.suite --size small --size medium --save baseline.json
+    python -m benchmarks.suite --size small --size medium --baseline baseline.json
+"""
+import argparse
+import itertools
+import json
+import os
+import tempfile
+import timeit
+import tracemalloc
+from lib import converter
+from lib import fileio
+from benchmarks.corpus import CORPORA, SIZES
+
+# Options the commands use by default for each target format
+OPTIONS = {
+    "json": {"preserve_binary": True},
+    "yaml": {"default_flow_style": False, "indent": 4, "strip_tabs": True, "detect_timestamp": True},
+    "plist": {"detect_timestamp": True, "none_handler": "fail"},
+    "bplist": {"detect_timestamp": True, "none_handler": "fail"}
+}
+
+
+def directions():
+    """Get every `(src, dst)` direction: each pair of formats both ways."""
+
+    return list(itertools.permutations(converter.FORMATS, 2))
+
+
+def make_source(tree, fmt):
+    """Serialize a corpus tree to a source format."""
+
+    return converter.dumps(tree, fmt, **OPTIONS[fmt])
+
+
+def best(fn, repeat):
+    """Get the best time of `repeat` runs."""
+
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def peak(fn):
+    """Get the peak memory allocated while running `fn`."""
+
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(source, src, dst, filename, repeat):
+    """Time each stage of one conversion and measure its peak memory."""
+
+    options = OPTIONS[dst]
+    obj = converter.loads(source, src, convert=False)
+    result = {
+        "parse": best(lambda: converter.loads(source, src, convert=False), repeat),
+        "dump": best(lambda: converter.dumps(obj, dst, src_fmt=src, **options), repeat),
+        "save": best(
+            lambda: fileio.write_stream(filename, lambda f: converter.dump(obj, dst, f, src_fmt=src, **options)),
+            repeat
+        )
+    }
+    result["peak"] = peak(
+        lambda: converter.dumps(converter.loads(source, src, convert=False), dst, src_fmt=src, **options)
+    )
+    result["bytes"] = len(source)
+    return result
+
+
+def compare(result, baseline):
+    """Format the ratio of the baseline's time to this run's time for the parse and dump stages."""
+
+    if baseline is None:
+        return ""
+    ratio = (baseline["parse"] + baseline["dump"]) / (result["parse"] + result["dump"])
+    return "  %5.2fx vs baseline" % ratio
+
+
+def main():
+    """Run the benchmark suite."""
+
+    parser = argparse.ArgumentParser(description="Benchmark every conversion direction.")
+    parser.add_argument("--corpus", action="append", choices=list(CORPORA), help="Corpus to convert (default: all).")
+    parser.add_argument("--size", action="append", choices=list(SIZES), help="Corpus size (default: small).")
+    parser.add_argument(
+        "--direction", action="append", metavar="SRC-DST",
+        help="Conversion direction such as json-yaml (default: all)."
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs (best is reported).")
+    parser.add_argument("--save", metavar="FILE", help="Save the results as a baseline.")
+    parser.add_argument("--baseline", metavar="FILE", help="Compare the results against a saved baseline.")
+    args = parser.parse_args()
+
+    pairs = directions()
+    if args.direction:
+        pairs = [tuple(d.split('-', 1)) for d in args.direction]
+        for pair in pairs:
+            if pair not in directions():
+                parser.error("unknown direction '%s'" % '-'.join(pair))
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+
+    results = {}
+    directory = tempfile.mkdtemp()
+    filename = os.path.join(directory, 'output')
+    try:
+        for corpus, size in itertools.product(args.corpus or list(CORPORA), args.size or ["small"]):
+            tree = CORPORA[corpus](SIZES[size])
+            sources = {}
+            print("%s (%s):" % (corpus, size))
+            print(
+                "    %-14s %9s %9s %9s %9s %10s %9s" % (
+                    "direction", "source", "parse", "dump", "save", "throughput", "peak"
+                )
+            )
+            for src, dst in pairs:
+                if src not in sources:
+                    sources[src] = make_source(tree, src)
+                key = "%s/%s/%s-%s" % (corpus, size, src, dst)
+                result = results[key] = run(sources[src], src, dst, filename, args.repeat)
+                print(
+                    "    %-14s %8.2fM %8.3fs %8.3fs %8.3fs %7.2fMB/s %8.2fM%s" % (
+                        "%s-%s" % (src, dst),
+                        result["bytes"] / 1024 / 1024,
+                        result["parse"],
+                        result["dump"],
+                        result["save"],
+                        result["bytes"] / 1024 / 1024 / (result["parse"] + result["dump"]),
+                        result["peak"] / 1024 / 1024,
+                        compare(result, baseline.get(key))
+                    )
+                )
+    finally:
+        if os.path.exists(filename):
+            os.remove(filename)
+        os.rmdir(directory)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
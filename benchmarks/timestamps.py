@@ -0,0 +1,77 @@
+"""
+Benchmark timestamp detection.
+
+Compares the pre-filtered `convert_timestamp` functions against running
+the full timestamp patterns on every string first (as they previously did),
+over a corpus of strings like those found in a tmLanguage file (regular
+expressions and scope names) with a few dates mixed in.
+
+    python -m benchmarks.timestamps --size 50000
+"""
+import argparse
+import random
+import timeit
+from lib import plist_includes as plist
+from lib import xmlplist
+from lib import yaml_includes as yaml
+
+SAMPLES = [
+    "\\b(if|else|elif|while|for|return)\\b",
+    "(?x)^\\s*(def)\\s+([A-Za-z_][A-Za-z0-9_]*)\\s*(?=\\()",
+    "keyword.control.flow.test",
+    "entity.name.function.test",
+    "punctuation.definition.string.begin.test",
+    "(\\d{4})-(\\d{2})-(\\d{2})",
+    "#comments",
+    "source.test",
+    "Test Language",
+    "2015-01-02T03:04:05Z",
+    "2015-01-02"
+]
+
+
+def unfiltered(pattern, convert):
+    """Run the full pattern on every string, and only convert the strings that match."""
+
+    def detect(obj):
+        m = pattern.match(obj)
+        return convert(m.group(0)) if m is not None else None
+
+    return detect
+
+
+def make_corpus(size):
+    """Make a corpus of mostly non date strings."""
+
+    rand = random.Random(0)
+    return [rand.choice(SAMPLES) + ("" if rand.random() < 0.9 else str(i)) for i in range(size)]
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description="Benchmark timestamp detection.")
+    parser.add_argument("--size", type=int, default=50000, help="Number of strings in the corpus.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs (best is reported).")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.size)
+    print("%d strings:" % len(corpus))
+    for label, pattern, detect in (
+        ("YAML", yaml.YAML_TIMESTAMP, yaml.convert_timestamp),
+        ("PLIST", xmlplist.PLIST_DATE, plist.convert_timestamp)
+    ):
+        previous = unfiltered(pattern, detect)
+        results = []
+        for name, fn in (
+            ("full match", lambda: [previous(s) for s in corpus]),
+            ("pre-filtered", lambda: [detect(s) for s in corpus])
+        ):
+            best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+            results.append(best)
+            print("    %-6s %-14s %8.4f s" % (label, name, best))
+        print("    %-6s speedup: %.2fx" % (label, results[0] / results[1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark tree transforms.
+
+Compares the explicit stack transforms against the previous recursive,
+in place walkers on wide and deep synthetic trees, and a single fused
+walk against separate source and target walks.
+
+    python -m benchmarks.transform --size 200000 --depth 5000
+"""
+import argparse
+import collections
+import timeit
+from lib import json_includes as json
+from lib import plist_includes as plist
+from lib.transform import pipeline
+
+
+def recursive_plist_convert_to(obj, none_handler="fail"):
+    """Previous recursive, in place walker."""
+
+    if isinstance(obj, dict):
+        for k, v in (list(obj.items()) if none_handler == "strip" else obj.items()):
+            if none_handler == "strip" and v is None:
+                del obj[k]
+            elif none_handler == "false" and v is None:
+                obj[k] = False
+            else:
+                obj[k] = recursive_plist_convert_to(v, none_handler)
+    elif isinstance(obj, list):
+        count = 0
+        offset = 0
+        for v in (obj[:] if none_handler == "strip" else obj):
+            if none_handler == "strip" and v is None:
+                del obj[count - offset]
+                offset += 1
+            elif none_handler == "false" and v is None:
+                obj[count - offset] = False
+            else:
+                obj[count - offset] = recursive_plist_convert_to(v, none_handler)
+            count += 1
+    return obj
+
+
+def make_wide(size):
+    """Make a wide tree: one long array with `None` in every other slot, and a wide dictionary."""
+
+    return collections.OrderedDict([
+        ("array", [None if i % 2 else "value %d" % i for i in range(size)]),
+        ("dict", collections.OrderedDict(("key%d" % i, i) for i in range(size)))
+    ])
+
+
+def make_deep(depth):
+    """Make a deeply nested tree."""
+
+    root = node = collections.OrderedDict()
+    for _ in range(depth):
+        child = collections.OrderedDict([("name", "value"), ("empty", None)])
+        node["child"] = [child]
+        node = child
+    return root
+
+
+def bench(name, fn, make_tree, repeat):
+    """Time `fn` on fresh trees (the old walker modifies them in place) and print the result."""
+
+    trees = [make_tree() for _ in range(repeat)]
+    try:
+        best = min(timeit.repeat(lambda: fn(trees.pop()), number=1, repeat=repeat))
+        print("    %-12s %8.3f s" % (name, best))
+    except RecursionError:
+        best = None
+        print("    %-12s RecursionError" % name)
+    return best
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description="Benchmark tree transforms.")
+    parser.add_argument("--size", type=int, default=200000, help="Number of items in wide containers.")
+    parser.add_argument("--depth", type=int, default=5000, help="Nesting depth of the deep tree.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs (best is reported).")
+    args = parser.parse_args()
+
+    trees = (
+        ("wide (%d items)" % args.size, lambda: make_wide(args.size)),
+        ("deep (%d levels)" % args.depth, lambda: make_deep(args.depth))
+    )
+    for label, make_tree in trees:
+        for handler in ("strip", "false"):
+            print("%s, none_handler=%s:" % (label, handler))
+            old = bench("recursive", lambda t: recursive_plist_convert_to(t, handler), make_tree, args.repeat)
+            new = bench("iterative", lambda t: plist.plist_convert_to(t, none_handler=handler), make_tree, args.repeat)
+            if old is not None:
+                print("    speedup: %.2fx" % (old / new))
+
+        print("%s, JSON to PLIST conversion walks:" % label)
+        old = bench(
+            "two walks",
+            lambda t: plist.plist_convert_to(json.json_convert_from(t), True, "strip"),
+            make_tree, args.repeat
+        )
+        new = bench(
+            "one walk",
+            lambda t: pipeline(t, json.json_from_step(), plist.plist_to_step(True, "strip")),
+            make_tree, args.repeat
+        )
+        print("    speedup: %.2fx" % (old / new))
+
+
+if __name__ == "__main__":
+    main()
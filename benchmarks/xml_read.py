@@ -0,0 +1,65 @@
+"""
+Benchmark reading XML PLISTs.
+
+Compares the incremental XML PLIST reader against the previous reader,
+which encoded the whole source, stripped comments with a regular
+expression, and then parsed it with `plistlib`.
+
+    python -m benchmarks.xml_read --size 8
+"""
+import argparse
+import collections
+import plistlib
+import re
+import timeit
+import tracemalloc
+from lib import json_includes
+from lib import xmlplist
+from benchmarks.json_sanitize import make_json
+
+
+def previous(text):
+    """Previous reader."""
+
+    data = re.sub(
+        br"^[\\r\\n\\s]*<!--[\\s\\S]*?-->[\\s\\r\\n]*|<!--[\\s\\S]*?-->", b'',
+        text.encode('utf-8')
+    )
+    return plistlib.loads(data, dict_type=collections.OrderedDict)
+
+
+def incremental(text):
+    """Incremental reader."""
+
+    return xmlplist.read_xml_plist(text)
+
+
+def peak(fn, text):
+    """Get the peak memory allocated while running `fn`."""
+
+    tracemalloc.start()
+    fn(text)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    """Run the benchmark."""
+
+    parser = argparse.ArgumentParser(description="Benchmark reading XML PLISTs.")
+    parser.add_argument("--size", type=float, default=8, help="Source JSON size in MB (the PLIST is larger).")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs (best is reported).")
+    args = parser.parse_args()
+
+    obj = json_includes.json_loads(make_json(int(args.size * 1024 * 1024), False))
+    text = plistlib.dumps(obj, sort_keys=False).decode('utf-8')
+    assert incremental(text) == previous(text)
+    print("%.2f MB of XML PLIST:" % (len(text) / 1024 / 1024))
+    for name, fn in (("previous", previous), ("incremental", incremental)):
+        best = min(timeit.repeat(lambda: fn(text), number=1, repeat=args.repeat))
+        print("    %-12s %8.3f s  peak %8.2f MB" % (name, best, peak(fn, text) / 1024 / 1024))
+
+
+if __name__ == "__main__":
+    main()
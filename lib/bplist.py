@@ -0,0 +1,190 @@
+"""
+Serialized Data Converter.
+
+Licensed under MIT
+Copyright (c) 2012 - 2015 Isaac Muse <isaacmuse@gmail.com>
+"""
+import collections
+import datetime
+import mmap
+import plistlib
+import struct
+from .transform import CHECK_INTERVAL
+
+__all__ = ("BinaryPlistReader", "read_binary_plist")
+
+BPLIST_MAGIC = b'bplist00'
+TRAILER = struct.Struct('>6xBBQQQ')
+INT_FORMATS = {1: 'B', 2: 'H', 4: 'L', 8: 'Q'}
+EPOCH = datetime.datetime(2001, 1, 1)
+
+
+class BinaryPlistReader(object):
+    """
+    Binary PLIST reader.
+
+    Reads from any buffer that supports slicing, such as bytes or an `mmap`.
+    The trailer and offset table are read directly from the buffer, and objects
+    are only decoded from the buffer as the tree is walked, so a memory mapped
+    file never needs to be copied into memory.
+    """
+
+    def __init__(self, buf, dict_type=collections.OrderedDict):
+        """Setup the reader and read the trailer."""
+
+        self.buf = buf
+        self.dict_type = dict_type
+        if len(buf) < len(BPLIST_MAGIC) + TRAILER.size or buf[:len(BPLIST_MAGIC)] != BPLIST_MAGIC:
+            raise plistlib.InvalidFileException()
+        (
+            self.offset_size, self.ref_size, self.num_objects, self.top_object, self.offset_table
+        ) = TRAILER.unpack(buf[-TRAILER.size:])
+        if (
+            not self.offset_size or not self.ref_size or
+            self.offset_table + self.offset_size * self.num_objects > len(buf) - TRAILER.size
+        ):
+            raise plistlib.InvalidFileException()
+        # Scalars are often shared (keys especially), so share the decoded objects as well.
+        self._cache = {}
+
+    def _read_ints(self, offset, count, size):
+        """Read `count` big endian unsigned integers of `size` bytes."""
+
+        end = offset + count * size
+        if size in INT_FORMATS:
+            return struct.unpack('>%d%s' % (count, INT_FORMATS[size]), self.buf[offset:end])
+        return [int.from_bytes(self.buf[i:i + size], 'big') for i in range(offset, end, size)]
+
+    def _get_offset(self, ref):
+        """Get the offset of an object from the offset table."""
+
+        if ref >= self.num_objects:
+            raise plistlib.InvalidFileException()
+        start = self.offset_table + ref * self.offset_size
+        return int.from_bytes(self.buf[start:start + self.offset_size], 'big')
+
+    def _get_size(self, low, offset):
+        """Get the size of an object and the offset of its content."""
+
+        if low == 0xF:
+            marker = self.buf[offset]
+            size = 1 << (marker & 0x3)
+            return int.from_bytes(self.buf[offset + 1:offset + 1 + size], 'big'), offset + 1 + size
+        return low, offset
+
+    def _read_object(self, ref):
+        """
+        Read an object.
+
+        Scalars are returned fully decoded. Containers are returned empty along with
+        the references to their keys (dictionaries only) and values so that the
+        caller can fill them in.
+        """
+
+        if ref in self._cache:
+            return self._cache[ref], None, None
+
+        buf = self.buf
+        offset = self._get_offset(ref)
+        token = buf[offset]
+        high = token & 0xF0
+        low = token & 0x0F
+        offset += 1
+        keys = values = None
+
+        if token == 0x00:
+            obj = None
+        elif token == 0x08:
+            obj = False
+        elif token == 0x09:
+            obj = True
+        elif token == 0x0F:
+            obj = b''
+        elif high == 0x10:
+            size = 1 << low
+            obj = int.from_bytes(buf[offset:offset + size], 'big', signed=low >= 3)
+        elif token == 0x22:
+            obj = struct.unpack('>f', buf[offset:offset + 4])[0]
+        elif token == 0x23:
+            obj = struct.unpack('>d', buf[offset:offset + 8])[0]
+        elif token == 0x33:
+            obj = EPOCH + datetime.timedelta(seconds=struct.unpack('>d', buf[offset:offset + 8])[0])
+        elif high == 0x40:
+            size, offset = self._get_size(low, offset)
+            obj = bytes(buf[offset:offset + size])
+        elif high == 0x50:
+            size, offset = self._get_size(low, offset)
+            obj = buf[offset:offset + size].decode('ascii')
+        elif high == 0x60:
+            size, offset = self._get_size(low, offset)
+            obj = buf[offset:offset + size * 2].decode('utf-16be')
+        elif high == 0x80:
+            obj = plistlib.UID(int.from_bytes(buf[offset:offset + 1 + low], 'big'))
+        elif high == 0xA0:
+            size, offset = self._get_size(low, offset)
+            obj = []
+            values = self._read_ints(offset, size, self.ref_size)
+        elif high == 0xD0:
+            size, offset = self._get_size(low, offset)
+            obj = self.dict_type()
+            keys = self._read_ints(offset, size, self.ref_size)
+            values = self._read_ints(offset + size * self.ref_size, size, self.ref_size)
+        else:
+            raise plistlib.InvalidFileException()
+
+        if values is None:
+            self._cache[ref] = obj
+        return obj, keys, values
+
+    def parse(self, check=None):
+        """
+        Decode the object tree, walking it with an explicit stack.
+
+        If given, `check` is called every so often to allow the read to be cancelled.
+        """
+
+        obj, keys, values = self._read_object(self.top_object)
+        if values is None:
+            return obj
+
+        active = {self.top_object}
+        stack = [[self.top_object, obj, keys, values, 0]]
+        count = 0
+        while stack:
+            if check is not None:
+                count += 1
+                if count >= CHECK_INTERVAL:
+                    count = 0
+                    check()
+            frame = stack[-1]
+            ref, container, keys, values, index = frame
+            if index == len(values):
+                active.discard(ref)
+                stack.pop()
+                continue
+            frame[4] += 1
+
+            child_ref = values[index]
+            if child_ref in active:
+                # Containers cannot contain themselves.
+                raise plistlib.InvalidFileException()
+            child, child_keys, child_values = self._read_object(child_ref)
+            if keys is None:
+                container.append(child)
+            else:
+                key = self._read_object(keys[index])[0]
+                if not isinstance(key, str):
+                    raise plistlib.InvalidFileException()
+                container[key] = child
+            if child_values is not None:
+                active.add(child_ref)
+                stack.append([child_ref, child, child_keys, child_values, 0])
+        return obj
+
+
+def read_binary_plist(filename, dict_type=collections.OrderedDict, check=None):
+    """Read a binary PLIST file through a memory map."""
+
+    with open(filename, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            return BinaryPlistReader(m, dict_type).parse(check)
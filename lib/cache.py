@@ -0,0 +1,155 @@
+"""
+Serialized Data Converter.
+
+Licensed under MIT
+Copyright (c) 2012 - 2015 Isaac Muse <isaacmuse@gmail.com>
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+__all__ = ("ConversionCache",)
+
+# Bump when conversion output changes so stale entries are not used.
+CACHE_VERSION = 2
+CHUNK_SIZE = 1024 * 1024
+
+
+class ConversionCache(object):
+    """
+    On disk cache of converted output.
+
+    Entries are keyed by a hash of the source, the source and target format,
+    and the options used for the conversion. Each entry is stored in its own
+    file, and the file's modification time is refreshed on every hit so that
+    the least recently used entries are evicted first once the cache grows
+    past `max_size` bytes.
+    """
+
+    def __init__(self, directory, max_size):
+        """Setup the cache."""
+
+        self.directory = directory
+        self.max_size = max_size
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(source_hash, src_fmt, dst_fmt, options):
+        """Make a cache key from a source hash and the conversion parameters."""
+
+        params = json.dumps([CACHE_VERSION, src_fmt, dst_fmt, options], sort_keys=True)
+        return hashlib.sha256((source_hash + params).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def hash_source(data):
+        """Hash source data (a string or bytes)."""
+
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def hash_file(filename):
+        """Hash the content of a file a chunk at a time."""
+
+        h = hashlib.sha256()
+        with open(filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def _path(self, key):
+        """Get the path of a cache entry."""
+
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        """Get the cached output as bytes, or `None` if there is no entry."""
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                output = f.read()
+            # Mark as recently used.
+            os.utime(path, None)
+        except OSError:
+            output = None
+        return output
+
+    def _store(self, key, write):
+        """Store an entry by calling `write` with a binary file handle, and evict old entries if needed."""
+
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp, self._path(key))
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self.prune()
+
+    def put(self, key, output):
+        """Store string or bytes output."""
+
+        if isinstance(output, str):
+            output = output.encode('utf-8')
+        if len(output) > self.max_size:
+            return
+        self._store(key, lambda f: f.write(output))
+
+    def put_file(self, key, filename):
+        """Store output that was written to a file."""
+
+        if os.path.getsize(filename) > self.max_size:
+            return
+
+        def write(f):
+            with open(filename, 'rb') as src:
+                shutil.copyfileobj(src, f)
+
+        self._store(key, write)
+
+    def entries(self):
+        """Get a list of cache entries as `(mtime, size, path)`."""
+
+        entries = []
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def prune(self):
+        """Evict the least recently used entries until the cache fits in `max_size`."""
+
+        with self._lock:
+            entries = sorted(self.entries())
+            total = sum(e[1] for e in entries)
+            for _, size, path in entries:
+                if total <= self.max_size:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total -= size
+
+    def clear(self):
+        """Remove all cache entries and return how many were removed."""
+
+        count = 0
+        with self._lock:
+            for _, _, path in self.entries():
+                try:
+                    os.remove(path)
+                    count += 1
+                except OSError:
+                    pass
+        return count
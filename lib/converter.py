@@ -0,0 +1,203 @@
+"""
+Serialized Data Converter.
+
+Licensed under MIT
+Copyright (c) 2012 - 2015 Isaac Muse <isaacmuse@gmail.com>
+"""
+import contextlib
+import os
+from . import json_includes as json
+from . import plist_includes as plist
+from . import yaml_includes as yaml
+from .tracing import NULL_TRACER, count_objects
+
+__all__ = ("FORMATS", "loads", "load_file", "dumps", "dump", "convert", "dump_all", "source_step")
+
+FORMATS = ("json", "yaml", "plist", "bplist")
+# Formats that can be written to a file handle without building the whole output first
+STREAM_FORMATS = ("json", "yaml", "plist", "bplist")
+# Formats that load dates as dates, so strings don't need to be scanned for timestamps
+NATIVE_DATES = ("yaml", "plist", "bplist")
+
+
+class ConverterException(Exception):
+    """Converter exception."""
+
+
+def _to_text(data):
+    """Ensure data is a Unicode string."""
+
+    return data.decode('utf-8') if isinstance(data, (bytes, bytearray)) else data
+
+
+@contextlib.contextmanager
+def _nesting_guard():
+    """Report data nested deeper than the parsers and writers can recurse as a converter error."""
+
+    try:
+        yield
+    except RecursionError:
+        raise ConverterException("Data is nested too deeply to convert!") from None
+
+
+def _check_format(fmt):
+    """Ensure the format is supported."""
+
+    if fmt not in FORMATS:
+        raise ConverterException("Unsupported format '%s'!" % fmt)
+
+
+def source_step(fmt):
+    """Get the node conversion that a source format needs after loading, or `None` if there is none."""
+
+    _check_format(fmt)
+    return json.json_from_step() if fmt == 'json' else None
+
+
+def loads(data, fmt, convert=True, tracer=None, check=None):
+    """
+    Read serialized data from a string or bytes.
+
+    JSON and YAML sources are decoded as UTF-8 if given bytes.
+    PLIST sources (XML or binary) may be either.
+
+    If `convert` is disabled, the data is returned as parsed, and the
+    source format should be passed to `dumps` so that the source conversion
+    is run in the same walk as the target conversion.
+
+    If a `tracer` is given, the parse is recorded as the `parse` stage. If given,
+    `check` is called every so often while reading, and can cancel the read by
+    raising an exception.
+
+    Data nested deeper than the parser can handle raises `ConverterException`.
+    """
+
+    _check_format(fmt)
+    if tracer is None:
+        tracer = NULL_TRACER
+    with _nesting_guard(), tracer.stage('parse', source=len(data)) as record:
+        if fmt == 'json':
+            obj = json.json_loads(_to_text(data), convert=convert, tracer=tracer, check=check)
+        elif fmt == 'yaml':
+            obj = yaml.yaml_loads(_to_text(data), convert=convert, check=check)
+        else:
+            obj = plist.plist_loads(data, convert=convert, check=check)
+    if tracer.enabled:
+        record['objects'] = count_objects(obj)
+    return obj
+
+
+def load_file(filename, fmt, convert=True, tracer=None, check=None):
+    """
+    Read serialized data from a file.
+
+    Binary PLISTs are read through a memory map. PLISTs are read and parsed
+    in one go, other formats are read first (the `read` stage if traced).
+    Takes the same `check` as `loads`.
+    """
+
+    _check_format(fmt)
+    if tracer is None:
+        tracer = NULL_TRACER
+    if fmt in ('plist', 'bplist'):
+        with _nesting_guard(), tracer.stage('parse', source=os.path.getsize(filename)) as record:
+            obj = plist.read_plist_from_file(filename, convert=convert, check=check)
+        if tracer.enabled:
+            record['objects'] = count_objects(obj)
+    else:
+        with tracer.stage('read') as record:
+            with open(filename, 'rb') as f:
+                data = f.read()
+            record['output'] = len(data)
+        obj = loads(data, fmt, convert=convert, tracer=tracer, check=check)
+    return obj
+
+
+def dumps(obj, fmt, src_fmt=None, tracer=None, check=None, **options):
+    """
+    Dump data to the given format.
+
+    Options are passed through to the format's dump function:
+
+    - json: `preserve_binary`
+    - yaml: `default_flow_style`, `indent`, `strip_tabs`, `detect_timestamp`
+    - plist, bplist: `detect_timestamp`, `none_handler`
+
+    If `src_fmt` is given, the data was loaded from that format with `convert`
+    disabled, and the source and target conversions are run together in a single
+    walk of the tree. Sources with native dates keep their dates as is, so strings
+    are only scanned for timestamps (`detect_timestamp`) when the source has none.
+
+    Binary PLISTs are returned as bytes, everything else as a Unicode string.
+
+    If a `tracer` is given, the conversion and serialization (they are done in
+    the same walk) are recorded as the `dump` stage. If given, `check` is called
+    every so often while dumping, and can cancel the dump by raising an exception.
+
+    Data nested deeper than the writer can handle raises `ConverterException`.
+    """
+
+    _check_format(fmt)
+    if tracer is None:
+        tracer = NULL_TRACER
+    step = source_step(src_fmt) if src_fmt is not None else None
+    if src_fmt in NATIVE_DATES and options.get('detect_timestamp'):
+        options['detect_timestamp'] = False
+    with _nesting_guard(), tracer.stage('dump') as record:
+        if fmt == 'json':
+            output = json.json_dumps(obj, source_step=step, check=check, **options)
+        elif fmt == 'yaml':
+            output = yaml.yaml_dumps(obj, source_step=step, check=check, **options)
+        elif fmt == 'plist':
+            output = plist.plist_dumps(obj, source_step=step, check=check, **options)
+        else:
+            output = plist.plist_binary_dumps(obj, source_step=step, check=check, **options)
+        record['output'] = len(output)
+    return output
+
+
+def dump(obj, fmt, fp, src_fmt=None, tracer=None, check=None, **options):
+    """
+    Dump data to a binary file handle.
+
+    Takes the same options (and `check`) as `dumps`. The output is written as it is
+    serialized, so the whole document is never held in memory as a string.
+    Text formats are written as UTF-8.
+    """
+
+    _check_format(fmt)
+    if tracer is None:
+        tracer = NULL_TRACER
+    step = source_step(src_fmt) if src_fmt is not None else None
+    if src_fmt in NATIVE_DATES and options.get('detect_timestamp'):
+        options['detect_timestamp'] = False
+    with _nesting_guard(), tracer.stage('dump') as record:
+        start = fp.tell() if tracer.enabled else 0
+        if fmt == 'json':
+            json.write_json_to_file(obj, fp, source_step=step, check=check, **options)
+        elif fmt == 'yaml':
+            yaml.write_yaml_to_file(obj, fp, source_step=step, check=check, **options)
+        else:
+            plist.write_plist_to_file(obj, fp, binary=fmt == 'bplist', source_step=step, check=check, **options)
+        if tracer.enabled:
+            record['output'] = fp.tell() - start
+
+
+def dump_all(obj, targets, src_fmt=None):
+    """
+    Dump one loaded tree to several formats.
+
+    `targets` is a list of `(fmt, options)` and a list of outputs is returned in
+    the same order. Conversions leave the loaded tree as is and only copy the
+    containers that lead to changed values, so the tree is parsed once and shared
+    by all targets (or kept for later use).
+    """
+
+    return [dumps(obj, fmt, src_fmt=src_fmt, **options) for fmt, options in targets]
+
+
+def convert(data, src_fmt, dst_fmt, **options):
+    """Convert data from one serialized format to another, walking the data only once."""
+
+    _check_format(dst_fmt)
+    return dumps(loads(data, src_fmt, convert=False), dst_fmt, src_fmt=src_fmt, **options)
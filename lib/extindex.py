@@ -0,0 +1,44 @@
+"""
+Serialized Data Converter.
+
+Licensed under MIT
+Copyright (c) 2012 - 2015 Isaac Muse <isaacmuse@gmail.com>
+"""
+
+__all__ = ("SuffixIndex",)
+
+
+class SuffixIndex(object):
+    """
+    Case insensitive index of file extensions.
+
+    Extensions are stored in a dictionary, so matching a filename only takes one
+    lookup per `.` in the filename no matter how many extensions are indexed.
+    When a filename matches several extensions, the one added first wins.
+    """
+
+    def __init__(self, entries=()):
+        """Index `(ext, value)` pairs. A leading `.` on an extension is ignored."""
+
+        self._index = {}
+        for order, (ext, value) in enumerate(entries):
+            if ext.startswith('.'):
+                ext = ext[1:]
+            self._index.setdefault(ext.lower(), (order, value))
+
+    def __len__(self):
+        """Get the number of indexed extensions."""
+
+        return len(self._index)
+
+    def match(self, filename):
+        """Get `(name, value)` for the extension the filename ends with, or `None` if there is none."""
+
+        best = None
+        dot = filename.find('.')
+        while dot != -1:
+            found = self._index.get(filename[dot + 1:].lower())
+            if found is not None and (best is None or found[0] < best[0]):
+                best = (found[0], dot, found[1])
+            dot = filename.find('.', dot + 1)
+        return None if best is None else (filename[:best[1]], best[2])
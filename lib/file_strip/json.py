@@ -6,7 +6,29 @@ Licensed under MIT
 Copyright (c) 2012 Isaac Muse <isaacmuse@gmail.com>
 """
 import re
-from .comments import Comments
+from .comments import Comments, LINE_PRESERVE
+
+COMMENT = r'''
+    /\*[^*]*\*+(?:[^/*][^*]*\*+)*/      # multi-line comments
+  | //[^\r\n]*(?![^\r\n])               # single line comments (always to the end of the line)
+'''
+
+SANITIZE_PATTERN = re.compile(
+    r'''(?x)
+        (?P<code>
+            (?:
+                "[^"\\]*(?:\\.[^"\\]*)*"      # double quoted string
+              | '[^'\\]*(?:\\.[^'\\]*)*'      # single quoted string
+              | [^"'/,]+                    # everything else
+              | /(?![/*])                   # slash that does not start a comment
+              | ,(?!\s*(?:(?:%(comment)s)\s*)*[\]}])   # comma that is not dangling
+            )+
+        )
+      | (?P<comments>%(comment)s)
+      | (?P<comma>,)                        # dangling comma
+    ''' % {"comment": COMMENT},
+    re.DOTALL
+)
 
 JSON_PATTERN = re.compile(
     r'''(?x)
@@ -66,6 +88,22 @@ def strip_comments(text, preserve_lines=False):
 
 
 def sanitize_json(text, preserve_lines=False):
-    """Sanitize the JSON file by removing comments and dangling commas."""
+    """
+    Sanitize the JSON file by removing comments and dangling commas.
+
+    Comments and dangling commas are removed in a single pass. Runs of code
+    are matched in bulk, so the replace callback is only called a handful of
+    times for code, and once for each comment or dangling comma.
+    """
+
+    def evaluate(m):
+        """Keep code, and remove comments and dangling commas."""
+
+        kind = m.lastgroup
+        if kind == "code":
+            return m.group(0)
+        elif kind == "comments" and preserve_lines:
+            return ''.join(LINE_PRESERVE.findall(m.group(0)))
+        return ''
 
-    return strip_dangling_commas(Comments('json', preserve_lines).strip(text), preserve_lines)
+    return SANITIZE_PATTERN.sub(evaluate, text)
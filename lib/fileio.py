@@ -0,0 +1,250 @@
+"""
+Serialized Data Converter.
+
+Licensed under MIT
+Copyright (c) 2012 - 2015 Isaac Muse <isaacmuse@gmail.com>
+"""
+import os
+import shutil
+import threading
+
+__all__ = (
+    "is_unchanged", "files_equal", "write_file", "stage_stream", "commit_stream", "discard_stream", "write_stream",
+    "CheckedWriter", "CompareWriter"
+)
+
+CHUNK_SIZE = 1024 * 1024
+# Amount of data to write between cancellation checks
+CHECK_SIZE = 64 * 1024
+
+
+def is_unchanged(filename, data):
+    """
+    Check if a file already contains exactly `data`.
+
+    The size is compared first, and only if it matches
+    is the file compared a chunk at a time.
+    """
+
+    try:
+        if os.path.getsize(filename) != len(data):
+            return False
+        view = memoryview(data)
+        with open(filename, 'rb') as f:
+            for start in range(0, len(view), CHUNK_SIZE):
+                if f.read(CHUNK_SIZE) != view[start:start + CHUNK_SIZE]:
+                    return False
+    except OSError:
+        return False
+    return True
+
+
+def files_equal(filename1, filename2):
+    """Check if two files have the same content, comparing the size first and then a chunk at a time."""
+
+    try:
+        if os.path.getsize(filename1) != os.path.getsize(filename2):
+            return False
+        with open(filename1, 'rb') as f1, open(filename2, 'rb') as f2:
+            while True:
+                chunk = f1.read(CHUNK_SIZE)
+                if chunk != f2.read(CHUNK_SIZE):
+                    return False
+                if not chunk:
+                    break
+    except OSError:
+        return False
+    return True
+
+
+class CheckedWriter(object):
+    """
+    File handle wrapper that calls `check` as data is written.
+
+    Lets a check abort a long write (when a conversion is cancelled) by raising
+    an exception. The check is called before the first write and then after
+    every `CHECK_SIZE` bytes (or characters). Everything else is passed to the
+    wrapped handle.
+    """
+
+    def __init__(self, fp, check):
+        """Wrap the file handle."""
+
+        self._fp = fp
+        self._check = check
+        self._pending = CHECK_SIZE
+
+    def write(self, data):
+        """Check every so often and write."""
+
+        self._pending += len(data)
+        if self._pending >= CHECK_SIZE:
+            self._pending = 0
+            self._check()
+        return self._fp.write(data)
+
+    def __getattr__(self, name):
+        """Get attributes from the wrapped file handle."""
+
+        return getattr(self._fp, name)
+
+
+def write_file(filename, data, compare=False):
+    """
+    Write string or bytes data to a file.
+
+    Strings are written as UTF-8. If `compare` is enabled and the file
+    already has the same content, the file is left untouched.
+    Returns `True` if the file was written.
+    """
+
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    if compare and is_unchanged(filename, data):
+        return False
+    with open(filename, 'wb') as f:
+        f.write(data)
+    return True
+
+
+class CompareWriter(object):
+    """
+    Binary file handle that only writes a temporary file once the output differs from an existing file.
+
+    Output is compared with the existing file as it is written. The temporary
+    file is created at the first difference, and the part of the existing file
+    that matched is copied into it, so nothing is created next to the existing
+    file while the output is the same.
+    """
+
+    def __init__(self, filename, tmp):
+        """Open the existing file (if there is one) to compare with."""
+
+        self.tmp = tmp
+        self._fp = None
+        self._size = 0
+        try:
+            self._existing = open(filename, 'rb')
+        except OSError:
+            self._existing = None
+            self._diverge()
+
+    def _diverge(self):
+        """Create the temporary file with the output that matched so far, and write to it from now on."""
+
+        self._fp = open(self.tmp, 'xb')
+        if self._existing is not None:
+            self._existing.seek(0)
+            remaining = self._size
+            while remaining:
+                chunk = self._existing.read(min(remaining, CHUNK_SIZE))
+                self._fp.write(chunk)
+                remaining -= len(chunk)
+            self._existing.close()
+            self._existing = None
+
+    def write(self, data):
+        """Compare the data with the existing file, or write it if the output already differs."""
+
+        if self._fp is None:
+            if self._existing.read(len(data)) == data:
+                self._size += len(data)
+                return len(data)
+            self._diverge()
+        return self._fp.write(data)
+
+    def tell(self):
+        """Get the size of the output so far."""
+
+        return self._size if self._fp is None else self._fp.tell()
+
+    def flush(self):
+        """Flush the temporary file."""
+
+        if self._fp is not None:
+            self._fp.flush()
+
+    def finish(self):
+        """Return `True` if the output differs from the existing file (the temporary file was created)."""
+
+        if self._fp is None and self._existing.read(1):
+            # The output is shorter than the existing file.
+            self._diverge()
+        return self._fp is not None
+
+    def close(self):
+        """Close the files."""
+
+        for f in (self._existing, self._fp):
+            if f is not None:
+                f.close()
+
+
+def stage_stream(filename, dump, compare=False):
+    """
+    Write the output for a file to a temporary file next to it by calling `dump` with a binary file handle.
+
+    Returns the name of the temporary file, which should be passed to
+    `commit_stream` to replace the target or to `discard_stream`. The temporary
+    file is removed if `dump` fails.
+
+    If `compare` is enabled, the output is compared with the file as it is
+    written, and `None` is returned without creating anything next to the file
+    if the file already has the same content.
+    """
+
+    tmp = '%s.%d-%d.tmp' % (os.path.realpath(filename), os.getpid(), threading.get_ident())
+    try:
+        if compare:
+            writer = CompareWriter(filename, tmp)
+            try:
+                dump(writer)
+                changed = writer.finish()
+            finally:
+                writer.close()
+            if not changed:
+                return None
+        else:
+            with open(tmp, 'xb') as f:
+                dump(f)
+    except BaseException:
+        discard_stream(tmp)
+        raise
+    return tmp
+
+
+def commit_stream(tmp, filename):
+    """Replace a file with its staged temporary file, keeping the file's permissions."""
+
+    filename = os.path.realpath(filename)
+    try:
+        if os.path.exists(filename):
+            shutil.copymode(filename, tmp)
+        os.replace(tmp, filename)
+    except BaseException:
+        discard_stream(tmp)
+        raise
+
+
+def discard_stream(tmp):
+    """Remove a staged temporary file."""
+
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+
+def write_stream(filename, dump, compare=False):
+    """
+    Write a file by calling `dump` with a binary file handle.
+
+    The output is written to a temporary file next to the target, which then
+    replaces the target, so the target is never left half written. If `compare`
+    is enabled and the target already has the same content, the target is left
+    untouched. Returns `True` if the file was written.
+    """
+
+    tmp = stage_stream(filename, dump, compare)
+    if tmp is None:
+        return False
+    commit_stream(tmp, filename)
+    return True
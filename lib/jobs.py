@@ -0,0 +1,111 @@
+"""
+Serialized Data Converter.
+
+Licensed under MIT
+Copyright (c) 2012 - 2015 Isaac Muse <isaacmuse@gmail.com>
+"""
+import threading
+import time
+from .tracing import NULL_TRACER
+
+__all__ = ("ConversionJob", "JobCancelled", "register", "unregister", "cancel_all", "has_jobs")
+
+_LOCK = threading.Lock()
+_JOBS = set()
+
+
+class JobCancelled(Exception):
+    """Job was cancelled."""
+
+
+class ConversionJob(object):
+    """
+    State of a single conversion.
+
+    A job holds everything a conversion needs so that
+    the parse and dump stages can run off the main thread.
+    """
+
+    def __init__(self, src_fmt, dst_fmt, source, options=None, save_filename=None, owner=None, source_file=None):
+        """Setup the job."""
+
+        self.src_fmt = src_fmt
+        self.dst_fmt = dst_fmt
+        self.source = source
+        self.source_file = source_file
+        self.options = {} if options is None else options
+        self.save_filename = save_filename
+        self.owner = owner
+        self.data = None
+        self.output = None
+        self.stage = None
+        self.cached = False
+        self.unchanged = False
+        self.streamed = False
+        # Temporary file holding streamed output until it replaces the target
+        self.staged = None
+        # Scheduler key the job holds until it ends (when run asynchronously)
+        self.schedule_key = None
+        self.tracer = NULL_TRACER
+        self.trigger = "command"
+        self.failed = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.started = time.perf_counter()
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        """Check if the job has been cancelled."""
+
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Cancel the job."""
+
+        self._cancelled.set()
+
+    def check(self):
+        """Raise `JobCancelled` if the job has been cancelled."""
+
+        if self._cancelled.is_set():
+            raise JobCancelled()
+
+    def set_stage(self, stage):
+        """Move the job to the next stage."""
+
+        self.check()
+        self.stage = stage
+
+
+def register(job):
+    """Track an in-flight job."""
+
+    with _LOCK:
+        _JOBS.add(job)
+
+
+def unregister(job):
+    """Stop tracking a job."""
+
+    with _LOCK:
+        _JOBS.discard(job)
+
+
+def cancel_all(owner=None):
+    """Cancel all in-flight jobs, or just the ones belonging to `owner`, and return how many were cancelled."""
+
+    count = 0
+    with _LOCK:
+        for job in _JOBS:
+            if owner is None or job.owner == owner:
+                job.cancel()
+                count += 1
+    return count
+
+
+def has_jobs():
+    """Check if there are any in-flight jobs."""
+
+    with _LOCK:
+        return bool(_JOBS)
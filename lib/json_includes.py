@@ -4,77 +4,181 @@ Serialized Data Converter.
 Licensed under MIT
 Copyright (c) 2012 - 2015 Isaac Muse <isaacmuse@gmail.com>
 """
-import sublime
 import json
 import base64
+import datetime
 import collections
 from .file_strip.json import sanitize_json
+from .transform import pipeline
+from .fileio import CheckedWriter
+from .tracing import NULL_TRACER
+
+__all__ = ("read_json_from_view", "json_loads", "json_dumps", "write_json_to_file")
 
-__all__ = ("read_json_from_view", "json_dumps")
 
+# Amount of encoded text to collect before writing it out
+WRITE_SIZE = 64 * 1024
 
-def json_dumps(obj, preserve_binary=False):
-    """Wrap json dumps."""
 
-    return json.dumps(
-        json_convert_to(obj, preserve_binary), sort_keys=False, indent=4, separators=(',', ': ')
-    ).encode('utf-8').decode('raw_unicode_escape')
+def json_encoder(preserve_binary=False):
+    """
+    Get the JSON encoder.
+
+    Binary data and dates are converted by the encoder as it comes across
+    them, so the tree does not need to be walked and copied beforehand.
+    """
+
+    convert = json_to_step(preserve_binary)
+
+    def default(obj):
+        """Convert objects JSON can't represent natively."""
+
+        node = convert(obj)
+        if node is obj:
+            raise TypeError("Object of type %s is not JSON serializable" % obj.__class__.__name__)
+        return node
+
+    return json.JSONEncoder(ensure_ascii=False, sort_keys=False, indent=4, separators=(',', ': '), default=default)
+
+
+def json_dumps(obj, preserve_binary=False, source_step=None, check=None):
+    """
+    Wrap json dumps.
+
+    `source_step` is the node conversion of the format the data was read from (loaded
+    with `convert=False`) and is run in the same walk as the JSON conversion.
+    `check` is called while converting to allow the dump to be cancelled.
+    """
+
+    obj = pipeline(obj, source_step, check=check)
+    # The encoder runs in one go (in C when available), so it can only be cancelled before it starts.
+    if check is not None:
+        check()
+    return json_encoder(preserve_binary).encode(obj)
+
+
+def write_json_to_file(obj, fp, preserve_binary=False, source_step=None, check=None):
+    """
+    Write JSON to a binary file handle as UTF-8.
+
+    The JSON is encoded and written out a piece at a time as the tree is
+    walked, so the whole document is never held in memory.
+    """
+
+    if check is not None:
+        fp = CheckedWriter(fp, check)
+    chunks = []
+    size = 0
+    for chunk in json_encoder(preserve_binary).iterencode(pipeline(obj, source_step, check=check)):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= WRITE_SIZE:
+            fp.write(''.join(chunks).encode('utf-8'))
+            chunks = []
+            size = 0
+    fp.write(''.join(chunks).encode('utf-8'))
+
+
+def json_loads(text, strict_first=True, convert=True, tracer=NULL_TRACER, check=None):
+    """
+    Read JSON data from a string.
+
+    Most JSON is machine generated and has no comments or dangling commas,
+    so by default the text is parsed as strict JSON first. Only if that
+    fails is the text sanitized and parsed again.
+
+    If `convert` is disabled, the data is returned as parsed so that
+    `json_from_step` can be run later along with other conversions.
+
+    Sanitizing is recorded as the `sanitize` stage of the `tracer`, and `check`
+    is called between the parse steps to allow the read to be cancelled.
+    """
+
+    obj = None
+    strict = False
+    if check is not None:
+        check()
+    if strict_first:
+        try:
+            obj = json.loads(text, object_pairs_hook=collections.OrderedDict)
+            strict = True
+        except ValueError:
+            pass
+
+    if not strict:
+        if check is not None:
+            check()
+        with tracer.stage('sanitize', source=len(text)):
+            text = sanitize_json(text, True)
+        if check is not None:
+            check()
+        obj = json.loads(text, object_pairs_hook=collections.OrderedDict)
+
+    return json_convert_from(obj, check) if convert else obj
 
 
 def read_json_from_view(view):
     """Read JSON data from a view."""
 
-    return json_convert_from(
-        json.loads(
-            sanitize_json(
-                view.substr(
-                    sublime.Region(0, view.size())
-                ),
-                True
-            ),
-            object_pairs_hook=collections.OrderedDict
-        )
+    import sublime
+
+    return json_loads(view.substr(sublime.Region(0, view.size())))
+
+
+def date_to_string(d):
+    """Format a date or datetime as a string."""
+
+    if not isinstance(d, datetime.datetime):
+        return d.isoformat()
+    return '%04d-%02d-%02dT%02d:%02d:%02d%sZ' % (
+        d.year, d.month, d.day, d.hour, d.minute, d.second,
+        ".%06d" % d.microsecond if d.microsecond != 0 else ""
     )
 
 
-def json_convert_to(obj, preserve_binary=False):
-    """Strip tabs and trailing spaces to allow block format to successfully be triggered."""
-
-    if isinstance(obj, (dict, collections.OrderedDict, dict)):
-        for k, v in obj.items():
-            obj[k] = json_convert_to(v, preserve_binary)
-    elif isinstance(obj, list):
-        count = 0
-        for v in obj:
-            obj[count] = json_convert_to(v, preserve_binary)
-            count += 1
-    elif isinstance(obj, bytes):
-        if preserve_binary:
-            obj = collections.OrderedDict(
-                [("!!python/object:plistlib.Data", base64.b64encode(obj.data).decode("ascii"))]
-            )
-        else:
-            obj = base64.b64encode(obj.data).decode("ascii")
-
-    return obj
-
-
-def json_convert_from(obj):
-    """Convert specific json items to a form usuable by others."""
+def json_to_step(preserve_binary=False):
+    """Get the node conversion that turns binary data and dates into a form JSON can represent."""
+
+    def convert(node):
+        """Convert a node."""
+
+        if isinstance(node, datetime.date):
+            node = date_to_string(node)
+        elif isinstance(node, bytes):
+            if preserve_binary:
+                node = collections.OrderedDict(
+                    [("!!python/object:plistlib.Data", base64.b64encode(node).decode("ascii"))]
+                )
+            else:
+                node = base64.b64encode(node).decode("ascii")
+        return node
+
+    return convert
+
+
+def json_from_step():
+    """Get the node conversion that restores binary data preserved in JSON."""
 
-    if isinstance(obj, (dict, collections.OrderedDict)):
-        if len(obj) == 1 and "!!python/object:plistlib.Data" in obj:
+    def convert(node):
+        """Convert a node."""
+
+        if isinstance(node, dict) and len(node) == 1 and "!!python/object:plistlib.Data" in node:
             try:
-                obj = bytes(base64.decodebytes(obj["!!python/object:plistlib.Data"].encode('ascii')))
+                node = bytes(base64.decodebytes(node["!!python/object:plistlib.Data"].encode('ascii')))
             except Exception:
-                obj = obj["!!python/object:plistlib.Data"]
-        else:
-            for k, v in obj.items():
-                obj[k] = json_convert_from(v)
-    elif isinstance(obj, list):
-        count = 0
-        for v in obj:
-            obj[count] = json_convert_from(v)
-            count += 1
-
-    return obj
+                node = node["!!python/object:plistlib.Data"]
+        return node
+
+    return convert
+
+
+def json_convert_to(obj, preserve_binary=False):
+    """Convert binary data to a form JSON can represent."""
+
+    return pipeline(obj, json_to_step(preserve_binary))
+
+
+def json_convert_from(obj, check=None):
+    """Convert specific json items to a form usuable by others."""
+
+    return pipeline(obj, json_from_step(), check=check)
@@ -4,15 +4,32 @@ Serialized Data Converter.
 Licensed under MIT
 Copyright (c) 2012 - 2015 Isaac Muse <isaacmuse@gmail.com>
 """
-import sublime
+import json
+import threading
 
-__all__ = ('error_msg',)
+__all__ = ('error_msg', 'trace_msg')
+
+_LOCK = threading.Lock()
 
 
 def error_msg(msg, e=None):
     """Error message."""
 
+    import sublime
+
     sublime.error_message(msg)
     if e is not None:
         print("Serialized Data Converter:")
         print(e)
+
+
+def trace_msg(tracer, log_file=None):
+    """Print a conversion trace's summary to the console, or append the trace to a JSON lines log file."""
+
+    if log_file:
+        line = json.dumps(tracer.to_dict(), sort_keys=True) + '\n'
+        with _LOCK:
+            with open(log_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+    else:
+        print("Serialized Data Converter: %s" % tracer.summary())
@@ -4,146 +4,199 @@ Serialized Data Converter.
 Licensed under MIT
 Copyright (c) 2012 - 2015 Isaac Muse <isaacmuse@gmail.com>
 """
-import sublime
+import io
 import plistlib
 import datetime
-import re
 import collections
+from . import bplist
+from . import xmlplist
+from .xmlplist import convert_timestamp
+from .transform import pipeline, DROP
+from .fileio import CheckedWriter
 
-__all__ = ("read_plist_from_view", "read_plist_from_file", "plist_dumps", "plist_binary_dumps")
+__all__ = (
+    "read_plist_from_view", "read_plist_from_hex_view", "read_plist_from_file",
+    "plist_loads", "plist_dumps", "plist_binary_dumps", "write_plist_to_file"
+)
 
+# Number of characters to read from a hex view at a time
+HEX_CHUNK_SIZE = 1024 * 1024
 
-def strip_plist_comments(text):
-    """Strip comments from plist."""
 
-    return re.sub(
-        br"^[\r\n\s]*<!--[\s\S]*?-->[\s\r\n]*|<!--[\s\S]*?-->", b'',
-        text
-    )
+def convert_from_hex(chunks, check=None):
+    """
+    Convert Sublime hex view text to bytes.
 
+    Text can be given as a string or an iterable of string chunks.
+    Chunks are decoded in bulk as they come in, and any hex pair split
+    across a chunk boundary is carried over to the next chunk, so only
+    the output bytes (and one chunk of text) are held in memory. If given,
+    `check` is called before each chunk to allow decoding to be cancelled.
+    """
 
-def convert_from_hex(view):
-    """Convert Sublime hex view to bytes."""
+    if isinstance(chunks, str):
+        chunks = (chunks,)
+
+    data = bytearray()
+    carry = ''
+    for chunk in chunks:
+        if check is not None:
+            check()
+        text = carry + chunk
+        # Decode up to the last separator and carry over the rest.
+        end = max(text.rfind(' '), text.rfind('\n'))
+        if end == -1:
+            carry = text
+            continue
+        data += bytes.fromhex(text[:end])
+        carry = text[end:]
+    data += bytes.fromhex(carry)
+    return data
+
+
+def convert_to_hex(data, chunk_size=HEX_CHUNK_SIZE):
+    """
+    Convert bytes to Sublime hex view text.
 
-    text = view.substr(sublime.Region(0, view.size())).replace(' ', '').replace('\n', '')
-    byte = []
-    offset = 0
-    for x in range(0, int(len(text) / 2)):
-        byte.append(int(text[x + offset:x + offset + 2], 16))
-        offset += 1
-    return bytes(byte)
+    Text is formatted like a Sublime hex view: 16 bytes per line
+    in groups of 2 bytes. Text is yielded in chunks of roughly
+    `chunk_size` characters that can be joined or inserted one
+    after the other.
+    """
 
+    # 16 bytes is 8 groups of 4 characters separated by spaces (39 characters),
+    # plus one separator between lines.
+    step = max(1, chunk_size // 40) * 16
+    view = memoryview(data)
+    for start in range(0, len(view), step):
+        text = view[start:start + step].hex(' ', -2)
+        yield ('\n' if start else '') + '\n'.join(text[i:i + 39] for i in range(0, len(text), 40))
 
-def plist_dumps(obj, detect_timestamp=False, none_handler="fail"):
-    """Wrapper for PLIST dump."""
 
-    return plistlib.dumps(
-        plist_convert_to(obj, detect_timestamp, none_handler),
-        sort_keys=False
-    ).decode('utf-8')
+def read_hex_from_view(view, chunk_size=HEX_CHUNK_SIZE):
+    """Read the bytes of a Sublime hex view in chunks."""
+
+    import sublime
+
+    size = view.size()
+    return convert_from_hex(
+        view.substr(sublime.Region(start, min(start + chunk_size, size))) for start in range(0, size, chunk_size)
+    )
 
 
-def plist_binary_dumps(obj, detect_timestamp=False, none_handler="fail"):
+def plist_dumps(obj, detect_timestamp=False, none_handler="fail", source_step=None, check=None):
+    """
+    Wrapper for PLIST dump.
+
+    `source_step` is the node conversion of the format the data was read from (loaded
+    with `convert=False`) and is run in the same walk as the PLIST conversion.
+    `check` is called every so often to allow the dump to be cancelled.
+    """
+
+    fp = io.BytesIO()
+    write_plist_to_file(obj, fp, False, detect_timestamp, none_handler, source_step, check)
+    return fp.getvalue().decode('utf-8')
+
+
+def plist_binary_dumps(obj, detect_timestamp=False, none_handler="fail", source_step=None, check=None):
     """Wrapper for PLIST binary dump."""
 
-    return plistlib.dumps(
-        plist_convert_to(obj, detect_timestamp, none_handler),
-        fmt=plistlib.FMT_BINARY,
+    fp = io.BytesIO()
+    write_plist_to_file(obj, fp, True, detect_timestamp, none_handler, source_step, check)
+    return fp.getvalue()
+
+
+def write_plist_to_file(
+    obj, fp, binary=False, detect_timestamp=False, none_handler="fail", source_step=None, check=None
+):
+    """Write an XML (or binary) PLIST to a binary file handle as it is generated."""
+
+    plistlib.dump(
+        pipeline(obj, source_step, plist_to_step(detect_timestamp, none_handler), check=check),
+        fp if check is None else CheckedWriter(fp, check),
+        fmt=plistlib.FMT_BINARY if binary else plistlib.FMT_XML,
         sort_keys=False
     )
 
 
+def plist_loads(data, convert=True, check=None):
+    """
+    Read PLIST from a string or bytes.
+
+    PLIST data is kept as parsed (dates and binary data are left as native
+    objects), `convert` is accepted so that all formats can be loaded the same way.
+    `check` is called every so often to allow the read to be cancelled.
+    """
+
+    if not isinstance(data, str) and data[:8] == bplist.BPLIST_MAGIC:
+        obj = bplist.BinaryPlistReader(data, dict_type=collections.OrderedDict).parse(check)
+    else:
+        # XML is parsed a chunk at a time, so strings don't need to be encoded up front.
+        obj = xmlplist.read_xml_plist(data, dict_type=collections.OrderedDict, check=check)
+
+    return obj
+
+
 def read_plist_from_hex_view(view):
     """Read PLIST from a Sublime hex view."""
 
-    return plist_convert_from(
-        plistlib.loads(
-            strip_plist_comments(convert_from_hex(view)),
-            dict_type=collections.OrderedDict
-        )
-    )
+    return plist_loads(read_hex_from_view(view))
 
 
-def read_plist_from_view(view):
-    """Read PLIST from  a Sublime view."""
+def read_plist_from_view(view, chunk_size=xmlplist.CHUNK_SIZE):
+    """Read an XML PLIST from a Sublime view a chunk at a time."""
 
-    return plist_convert_from(
-        plistlib.loads(
-            strip_plist_comments(
-                view.substr(
-                    sublime.Region(0, view.size())
-                ).encode('utf8')
-            ),
-            dict_type=collections.OrderedDict
-        )
+    import sublime
+
+    size = view.size()
+    return xmlplist.read_xml_plist(
+        (view.substr(sublime.Region(start, min(start + chunk_size, size))) for start in range(0, size, chunk_size)),
+        dict_type=collections.OrderedDict
     )
 
 
-def read_plist_from_file(filename):
+def read_plist_from_file(filename, convert=True, check=None):
     """
     Read PLIST from filename.
 
-    This is only used when reading binary plists,
-    so no need to strip comments.
+    Binary PLISTs are read through a memory map and XML PLISTs are parsed
+    a chunk at a time instead of loading the whole file into memory.
     """
 
-    return plist_convert_from(
-        plistlib.readPlist(filename, dict_type=collections.OrderedDict)
-    )
-
+    with open(filename, 'rb') as f:
+        if f.read(8) != bplist.BPLIST_MAGIC:
+            f.seek(0)
+            return xmlplist.read_xml_plist(
+                iter(lambda: f.read(xmlplist.CHUNK_SIZE), b''), dict_type=collections.OrderedDict, check=check
+            )
 
-def convert_timestamp(obj):
-    """Convert plist timestamp."""
+    return bplist.read_binary_plist(filename, dict_type=collections.OrderedDict, check=check)
 
-    time_stamp = None
-    if plistlib._dateParser.match(obj):
-        time_stamp = plistlib._dateFromString(obj)
-    return time_stamp
 
+def plist_to_step(detect_timestamp=False, none_handler="fail"):
+    """Get the node conversion for PLIST output."""
 
-def plist_convert_from(obj):
-    """Convert specific plist items to a form usable by others."""
+    def convert(node):
+        """Convert a node."""
 
-    if isinstance(obj, (collections.OrderedDict, dict)):
-        for k, v in obj.items():
-            obj[k] = plist_convert_from(v)
-    elif isinstance(obj, list):
-        count = 0
-        for v in obj:
-            obj[count] = plist_convert_from(v)
-            count += 1
-    elif isinstance(obj, datetime.datetime):
-        obj = plistlib._dateToString(obj)
+        if isinstance(node, datetime.date) and not isinstance(node, datetime.datetime):
+            # PLIST only has one date type.
+            node = datetime.datetime(node.year, node.month, node.day)
+        elif node is None:
+            if none_handler == "strip":
+                node = DROP
+            elif none_handler == "false":
+                node = False
+        elif detect_timestamp and isinstance(node, str):
+            time_stamp = convert_timestamp(node)
+            if time_stamp is not None:
+                node = time_stamp
+        return node
 
-    return obj
+    return convert
 
 
 def plist_convert_to(obj, detect_timestamp=False, none_handler="fail"):
     """Convert specific serialized items to a plist format."""
 
-    if isinstance(obj, dict):
-        for k, v in (list(obj.items()) if none_handler == "strip" else obj.items()):
-            if none_handler == "strip" and v is None:
-                del obj[k]
-            elif none_handler == "false" and v is None:
-                obj[k] = False
-            else:
-                obj[k] = plist_convert_to(v, detect_timestamp, none_handler)
-    elif isinstance(obj, list):
-        count = 0
-        offset = 0
-        for v in (obj[:] if none_handler == "strip" else obj):
-            if none_handler == "strip" and v is None:
-                del obj[count - offset]
-                offset += 1
-            elif none_handler == "false" and v is None:
-                obj[count - offset] = False
-            else:
-                obj[count - offset] = plist_convert_to(v, detect_timestamp, none_handler)
-            count += 1
-    elif isinstance(obj, str) and detect_timestamp:
-        time_stamp = convert_timestamp(obj)
-        if time_stamp is not None:
-            obj = time_stamp
-
-    return obj
+    return pipeline(obj, plist_to_step(detect_timestamp, none_handler))
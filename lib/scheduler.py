@@ -0,0 +1,106 @@
+"""
+Serialized Data Converter.
+
+Licensed under MIT
+Copyright (c) 2012 - 2015 Isaac Muse <isaacmuse@gmail.com>
+"""
+from collections import OrderedDict
+import threading
+import traceback
+
+__all__ = ("Scheduler",)
+
+
+class Scheduler(object):
+    """
+    Coalescing task scheduler.
+
+    Tasks are keyed (conversions by their target path). Only one task per key
+    runs at a time, and only the newest task waiting on a key is kept: a task
+    submitted while another task for the same key is waiting replaces it, and
+    the replaced task's `drop` callback is called. Tasks for different keys
+    run concurrently on up to `max_workers` threads.
+
+    A task that writes several targets is submitted under a list of keys. It
+    only starts once none of its keys are running, and holds all of them while
+    it runs. It only replaces a waiting task with the same keys. Tasks sharing
+    a key start in the order they were submitted.
+
+    A task submitted with `hold` keeps its keys after it returns (its worker is
+    freed), until `release` is called. This lets work the task hands off to
+    another thread finish before the next task for the same key starts.
+    """
+
+    def __init__(self, max_workers=2):
+        """Setup the scheduler."""
+
+        self.max_workers = max(1, int(max_workers))
+        self._lock = threading.Lock()
+        self._running = set()
+        self._pending = OrderedDict()
+        self._workers = 0
+
+    @staticmethod
+    def _keys(key):
+        """Get the set of keys for a key or list of keys."""
+
+        return frozenset(key) if isinstance(key, list) else frozenset((key,))
+
+    def submit(self, key, run, drop=None, hold=False):
+        """Schedule `run` under `key` (or a list of keys), replacing any task still waiting on the same key."""
+
+        key = self._keys(key)
+        with self._lock:
+            replaced = self._pending.pop(key, None)
+            self._pending[key] = (run, drop, hold)
+            self._dispatch()
+
+        if replaced is not None and replaced[1] is not None:
+            replaced[1]()
+
+    def pending(self):
+        """Get the number of tasks waiting to run."""
+
+        with self._lock:
+            return len(self._pending)
+
+    def _dispatch(self):
+        """Start waiting tasks whose keys are not running while there are free workers (lock must be held)."""
+
+        # Keys of earlier tasks that are still waiting, so later tasks sharing a key don't overtake them
+        waiting = set()
+        for key in list(self._pending):
+            if self._workers >= self.max_workers:
+                break
+            if not self._running.isdisjoint(key) or not waiting.isdisjoint(key):
+                waiting.update(key)
+                continue
+            run, _, hold = self._pending.pop(key)
+            self._running.update(key)
+            self._workers += 1
+            threading.Thread(target=self._work, args=(key, run, hold), daemon=True).start()
+
+    def release(self, key):
+        """Release the keys (a key or list of keys) of a task that was submitted with `hold`."""
+
+        with self._lock:
+            self._running.difference_update(self._keys(key))
+            self._dispatch()
+
+    def _work(self, key, run, hold):
+        """Run a task and then start whatever can run next."""
+
+        failed = False
+        try:
+            run()
+        except Exception:
+            # The task will not get to release its keys.
+            failed = True
+            print("Serialized Data Converter: Scheduled task failed")
+            print(traceback.format_exc())
+        finally:
+            with self._lock:
+                if not hold or failed:
+                    self._running.difference_update(key)
+                self._workers -= 1
+                self._dispatch()
@@ -0,0 +1,176 @@
+"""
+Serialized Data Converter.
+
+Licensed under MIT
+Copyright (c) 2012 - 2015 Isaac Muse <isaacmuse@gmail.com>
+"""
+import json
+import math
+import threading
+from . import fileio
+from .tracing import format_size
+
+__all__ = ("ConversionStats",)
+
+# Bump when the format of saved statistics changes so old statistics are ignored.
+STATS_VERSION = 1
+
+# Latency histogram buckets start at 0.1 ms and each is a quarter octave (about 19%) wider than the last.
+BUCKET_BASE = 0.0001
+BUCKET_STEPS = 4
+
+PERCENTILES = (50, 95, 99)
+
+# Outcomes counted for each direction and trigger
+OUTCOMES = ("cached", "unchanged", "cancelled", "failed")
+
+
+def bucket_index(seconds):
+    """Get the histogram bucket for a latency."""
+
+    if seconds <= BUCKET_BASE:
+        return 0
+    return int(math.ceil(math.log2(seconds / BUCKET_BASE) * BUCKET_STEPS))
+
+
+def bucket_limit(index):
+    """Get the upper limit of a histogram bucket."""
+
+    return BUCKET_BASE * 2 ** (index / BUCKET_STEPS)
+
+
+class ConversionStats(object):
+    """
+    Aggregated metrics of conversions.
+
+    Conversions are grouped by direction (`json_to_yaml`) and trigger (a command
+    or `convert_on_save`). Each group counts its conversions and their outcomes,
+    the bytes read and written, and keeps a histogram of latencies so percentiles
+    can be reported without keeping every latency. The histogram buckets are about
+    19% wide, so percentiles are approximate (the upper limit of their bucket).
+    """
+
+    def __init__(self):
+        """Setup the statistics."""
+
+        self._lock = threading.Lock()
+        self.groups = {}
+
+    @staticmethod
+    def _new_group():
+        """Create an empty group."""
+
+        group = {"count": 0, "bytes_in": 0, "bytes_out": 0, "time": 0.0, "max": 0.0, "histogram": {}}
+        for outcome in OUTCOMES:
+            group[outcome] = 0
+        return group
+
+    def record(self, direction, trigger, seconds, bytes_in=0, bytes_out=0, outcome=None):
+        """Record a conversion."""
+
+        with self._lock:
+            group = self.groups.get((direction, trigger))
+            if group is None:
+                group = self.groups[(direction, trigger)] = self._new_group()
+            group["count"] += 1
+            group["bytes_in"] += bytes_in
+            group["bytes_out"] += bytes_out
+            group["time"] += seconds
+            group["max"] = max(group["max"], seconds)
+            index = bucket_index(seconds)
+            group["histogram"][index] = group["histogram"].get(index, 0) + 1
+            if outcome is not None:
+                group[outcome] += 1
+
+    def clear(self):
+        """Remove all statistics."""
+
+        with self._lock:
+            self.groups.clear()
+
+    @staticmethod
+    def percentile(group, percent):
+        """Get the approximate latency that `percent` percent of a group's conversions finished within."""
+
+        if not group["count"]:
+            return 0.0
+        target = math.ceil(group["count"] * percent / 100.0)
+        seen = 0
+        for index in sorted(group["histogram"]):
+            seen += group["histogram"][index]
+            if seen >= target:
+                break
+        return min(bucket_limit(index), group["max"])
+
+    def to_dict(self):
+        """Get the statistics as a dictionary that can be saved as JSON."""
+
+        with self._lock:
+            groups = []
+            for (direction, trigger), group in sorted(self.groups.items()):
+                group = dict(group, histogram={str(k): v for k, v in group["histogram"].items()})
+                group.update(direction=direction, trigger=trigger)
+                groups.append(group)
+        return {"version": STATS_VERSION, "groups": groups}
+
+    def update(self, data):
+        """Add statistics from a dictionary created by `to_dict`, ignoring statistics of another version."""
+
+        if data.get("version") != STATS_VERSION:
+            return
+        with self._lock:
+            for saved in data.get("groups", []):
+                key = (saved["direction"], saved["trigger"])
+                group = self.groups.get(key)
+                if group is None:
+                    group = self.groups[key] = self._new_group()
+                for name, value in saved.items():
+                    if name == "max":
+                        group["max"] = max(group["max"], value)
+                    elif name == "histogram":
+                        for index, count in value.items():
+                            group["histogram"][int(index)] = group["histogram"].get(int(index), 0) + count
+                    elif name in group:
+                        group[name] += value
+
+    def load(self, filename):
+        """Add statistics saved to a file, returning `False` if the file could not be read."""
+
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                self.update(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return False
+        return True
+
+    def save(self, filename):
+        """Save the statistics to a file."""
+
+        data = json.dumps(self.to_dict(), sort_keys=True).encode('utf-8')
+        fileio.write_stream(filename, lambda f: f.write(data))
+
+    def report(self):
+        """Format the statistics as a table."""
+
+        header = ("Direction", "Trigger", "Count", "Cached", "Unchanged", "Cancelled", "Failed", "In", "Out") + tuple(
+            "p%d" % p for p in PERCENTILES
+        ) + ("Max",)
+        rows = [header]
+        with self._lock:
+            for (direction, trigger), group in sorted(self.groups.items()):
+                rows.append(
+                    (direction, trigger) +
+                    tuple(str(group[name]) for name in ("count",) + OUTCOMES) +
+                    (format_size(group["bytes_in"]), format_size(group["bytes_out"])) +
+                    tuple("%.3fs" % self.percentile(group, p) for p in PERCENTILES) +
+                    ("%.3fs" % group["max"],)
+                )
+        if len(rows) == 1:
+            return "No conversions recorded.\n"
+        widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+        lines = []
+        for row in rows:
+            lines.append("  ".join(
+                cell.ljust(width) if i < 2 else cell.rjust(width) for i, (cell, width) in enumerate(zip(row, widths))
+            ).rstrip())
+        return "\n".join(lines) + "\n"
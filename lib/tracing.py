@@ -0,0 +1,158 @@
+"""
+Serialized Data Converter.
+
+Licensed under MIT
+Copyright (c) 2012 - 2015 Isaac Muse <isaacmuse@gmail.com>
+"""
+import contextlib
+import time
+
+__all__ = ("Tracer", "NULL_TRACER", "count_objects")
+
+
+def count_objects(obj):
+    """Count the nodes (containers and scalars) in a tree."""
+
+    count = 0
+    stack = [obj]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, (list, tuple)):
+            stack.extend(node)
+    return count
+
+
+def format_size(size):
+    """Format a size in bytes (or characters)."""
+
+    if size < 1024:
+        return "%dB" % size
+    elif size < 1024 * 1024:
+        return "%.1fKB" % (size / 1024)
+    return "%.1fMB" % (size / 1024 / 1024)
+
+
+class Tracer(object):
+    """
+    Record the wall time of each stage of a conversion.
+
+    Each stage is recorded as a dictionary with its `name` and `time` in seconds.
+    Stages can add their input and output size in bytes or characters (`source`
+    and `output`) and the number of objects they handled (`objects`) to the
+    dictionary they are given. Stages are recorded in the order they finish,
+    so a stage that contains other stages is listed after them.
+    """
+
+    enabled = True
+
+    def __init__(self, name, **info):
+        """Setup the tracer, `info` is extra information to add to the trace."""
+
+        self.name = name
+        self.info = info
+        self.stages = []
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.elapsed = None
+
+    @contextlib.contextmanager
+    def stage(self, name, **info):
+        """Time a stage, yielding the stage's record so that sizes and counts can be added."""
+
+        record = {"name": name}
+        record.update(info)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["time"] = time.perf_counter() - start
+            self.stages.append(record)
+
+    def iterate(self, name, iterable):
+        """
+        Time producing the items of an iterable as a stage.
+
+        Only the time spent getting each item is recorded, not the time spent
+        handling it, and the total length of the items is recorded as the output.
+        """
+
+        record = {"name": name, "time": 0.0, "output": 0}
+        iterator = iter(iterable)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    record["time"] += time.perf_counter() - start
+                record["output"] += len(item)
+                yield item
+        finally:
+            self.stages.append(record)
+
+    def add(self, records):
+        """Add stages recorded by another tracer (stages shared by several conversions)."""
+
+        self.stages.extend(records)
+
+    def stop(self):
+        """Stop the overall timer."""
+
+        if self.elapsed is None:
+            self.elapsed = time.perf_counter() - self._start
+        return self.elapsed
+
+    def to_dict(self):
+        """Get the trace as a dictionary."""
+
+        trace = dict(self.info)
+        trace.update(name=self.name, started=self.started, time=self.stop(), stages=list(self.stages))
+        return trace
+
+    def summary(self):
+        """Get a one line summary of the trace."""
+
+        parts = []
+        for record in self.stages:
+            text = "%s %.3fs" % (record["name"], record["time"])
+            sizes = []
+            if "source" in record:
+                sizes.append(format_size(record["source"]))
+            if "output" in record:
+                sizes.append("-> " + format_size(record["output"]))
+            if "objects" in record:
+                sizes.append("%d objects" % record["objects"])
+            if sizes:
+                text += " (%s)" % " ".join(sizes)
+            parts.append(text)
+        flags = "".join(" (%s)" % key for key, value in sorted(self.info.items()) if value is True)
+        return "%s%s: %.3fs [%s]" % (self.name, flags, self.stop(), ", ".join(parts))
+
+
+class NullTracer(object):
+    """Tracer that records nothing, used when tracing is disabled."""
+
+    enabled = False
+    stages = ()
+
+    @contextlib.contextmanager
+    def stage(self, name, **info):
+        """Run a stage without timing it."""
+
+        yield {}
+
+    def iterate(self, name, iterable):
+        """Return the iterable as is."""
+
+        return iterable
+
+    def add(self, records):
+        """Discard the stages."""
+
+
+NULL_TRACER = NullTracer()
@@ -0,0 +1,177 @@
+"""
+Serialized Data Converter.
+
+Licensed under MIT
+Copyright (c) 2012 - 2015 Isaac Muse <isaacmuse@gmail.com>
+"""
+import itertools
+
+__all__ = ("DROP", "transform", "compose", "pipeline")
+
+
+# Return from a node conversion to remove the node from its container
+DROP = object()
+
+# Number of nodes (or items) to handle between calls to a cancellation check
+CHECK_INTERVAL = 1024
+
+
+def _copy_prefix(obj, count):
+    """Copy the first `count` items of a container into a new container of the same kind."""
+
+    if isinstance(obj, dict):
+        container = obj.__class__()
+        for key, value in itertools.islice(obj.items(), count):
+            container[key] = value
+        return container
+    return obj[:count]
+
+
+def _new_frame(obj):
+    """
+    Create a stack frame for walking a container.
+
+    A frame is the container, an iterator over its `(key, value)` items (indexes
+    for lists), its copy (`None` until a child changes), the number of unchanged
+    items before the first change, and the item waiting on a child container.
+    """
+
+    return [obj, iter(obj.items()) if isinstance(obj, dict) else enumerate(obj), None, 0, None, None]
+
+
+def _checked_convert(convert, check):
+    """Wrap a node conversion so that `check` is called every `CHECK_INTERVAL` nodes."""
+
+    count = 0
+
+    def checked_convert(node):
+        """Call the check every so often and convert the node."""
+
+        nonlocal count
+        count += 1
+        if count >= CHECK_INTERVAL:
+            count = 0
+            check()
+        return convert(node)
+
+    return checked_convert
+
+
+def transform(obj, convert, check=None):
+    """
+    Convert every node in a tree.
+
+    `convert` is called on every node (containers included) before its
+    children, and returns the node to use in its place. Returning `DROP`
+    removes the node from its parent container. The original tree is not
+    modified: a container is only copied (with its converted children) once
+    one of its children changes, and containers with no changes are shared
+    with the original tree, so converting a tree that mostly stays the same
+    does not copy it. The tree is walked with an explicit stack so that deeply
+    nested data is not limited by the recursion limit.
+
+    If given, `check` is called every so often so that it can abort the walk
+    by raising an exception (when a conversion is cancelled).
+    """
+
+    if check is not None:
+        convert = _checked_convert(convert, check)
+    obj = convert(obj)
+    if obj is DROP:
+        return None
+    if not isinstance(obj, (dict, list)):
+        return obj
+
+    active = {id(obj)}
+    stack = [_new_frame(obj)]
+    result = None
+    while stack:
+        frame = stack[-1]
+        original, items, container = frame[0], frame[1], frame[2]
+        child = None
+        for key, value in items:
+            new = convert(value)
+            if new is not DROP and isinstance(new, (dict, list)):
+                child = new
+                frame[4] = key
+                frame[5] = value
+                break
+            if container is None:
+                if new is value:
+                    frame[3] += 1
+                    continue
+                container = frame[2] = _copy_prefix(original, frame[3])
+            if new is DROP:
+                continue
+            if isinstance(container, dict):
+                container[key] = new
+            else:
+                container.append(new)
+
+        if child is None:
+            # Container is done
+            active.discard(id(original))
+            stack.pop()
+            result = original if container is None else container
+            if not stack:
+                break
+            # Add the finished container to its parent
+            frame = stack[-1]
+            key, value = frame[4], frame[5]
+            frame[4] = frame[5] = None
+            container = frame[2]
+            if container is None:
+                if result is value:
+                    frame[3] += 1
+                    continue
+                container = frame[2] = _copy_prefix(frame[0], frame[3])
+            if isinstance(container, dict):
+                container[key] = result
+            else:
+                container.append(result)
+        else:
+            # Descend into the child container
+            if id(child) in active:
+                raise ValueError("Circular reference detected")
+            active.add(id(child))
+            stack.append(_new_frame(child))
+    return result
+
+
+def compose(*steps):
+    """
+    Compose node conversion steps into a single conversion.
+
+    Steps that are `None` are skipped. Each step is given the result of the one
+    before it, and once a step returns `DROP` the remaining steps are not run.
+    If there are no steps, `None` is returned.
+    """
+
+    steps = tuple(step for step in steps if step is not None)
+    if not steps:
+        return None
+    if len(steps) == 1:
+        return steps[0]
+
+    def convert(node):
+        """Run each step on the node."""
+
+        for step in steps:
+            node = step(node)
+            if node is DROP:
+                break
+        return node
+
+    return convert
+
+
+def pipeline(obj, *steps, check=None):
+    """
+    Run all node conversion steps over a tree in a single walk.
+
+    If there are no steps, the tree is returned as is without being walked.
+    `check` is passed to `transform`.
+    """
+
+    convert = compose(*steps)
+    return obj if convert is None else transform(obj, convert, check)
@@ -0,0 +1,173 @@
+"""
+Serialized Data Converter.
+
+Licensed under MIT
+Copyright (c) 2012 - 2015 Isaac Muse <isaacmuse@gmail.com>
+"""
+import base64
+import collections
+import datetime
+import plistlib
+import re
+from xml.parsers.expat import ParserCreate
+
+__all__ = ("XmlPlistReader", "read_xml_plist", "convert_timestamp")
+
+# Number of characters or bytes to feed the parser at a time
+CHUNK_SIZE = 1024 * 1024
+
+# Date format used by PLIST `<date>` elements
+PLIST_DATE = re.compile(
+    r'(?P<year>\d\d\d\d)(?:-(?P<month>\d\d)(?:-(?P<day>\d\d)'
+    r'(?:T(?P<hour>\d\d)(?::(?P<minute>\d\d)(?::(?P<second>\d\d))?)?)?)?)?Z'
+)
+# Length range of `PLIST_DATE` strings (`2015Z` to `2015-01-02T03:04:05Z`)
+DATE_MIN = 5
+DATE_MAX = 20
+
+
+def convert_timestamp(obj):
+    """Convert plist timestamp."""
+
+    time_stamp = None
+    m = None
+    # Quickly rule out strings of the wrong length or without a trailing `Z` before running the full pattern.
+    if DATE_MIN <= len(obj) <= DATE_MAX and obj[-1] == 'Z':
+        m = PLIST_DATE.fullmatch(obj)
+    if m is not None:
+        values = [int(v) for v in m.groups() if v is not None]
+        # Missing month and day default to 1, missing time defaults to 0
+        values += [1] * (3 - len(values))
+        time_stamp = datetime.datetime(*values)
+    return time_stamp
+
+
+class XmlPlistReader(object):
+    """
+    Incremental XML PLIST reader.
+
+    The source is fed to expat a chunk at a time and the tree is built as
+    elements are closed, so the source never needs to be held in memory all
+    at once. Comments are simply never reported by expat, so they don't need
+    to be stripped beforehand.
+    """
+
+    def __init__(self, dict_type=collections.OrderedDict):
+        """Setup the parser."""
+
+        self.dict_type = dict_type
+        self.root = None
+        self._found_root = False
+        self._stack = []
+        self._key = None
+        self._data = []
+        self._parser = ParserCreate()
+        self._parser.StartElementHandler = self._start
+        self._parser.EndElementHandler = self._end
+        self._parser.CharacterDataHandler = self._data.append
+        self._parser.EntityDeclHandler = self._entity_decl
+        self._parser.buffer_text = True
+
+    def _entity_decl(self, *args):
+        """Reject entity declarations to guard against entity expansion attacks."""
+
+        raise plistlib.InvalidFileException("XML entity declarations are not supported in plist files")
+
+    def _add(self, value):
+        """Add a value to the current container, or make it the root."""
+
+        if self._key is not None:
+            if not isinstance(self._stack[-1], dict):
+                raise ValueError("unexpected element at line %d" % self._parser.CurrentLineNumber)
+            self._stack[-1][self._key] = value
+            self._key = None
+        elif not self._stack:
+            if self._found_root:
+                raise ValueError("unexpected element at line %d" % self._parser.CurrentLineNumber)
+            self.root = value
+            self._found_root = True
+        elif isinstance(self._stack[-1], list):
+            self._stack[-1].append(value)
+        else:
+            raise ValueError("missing key for value at line %d" % self._parser.CurrentLineNumber)
+
+    def _text(self):
+        """Get the text collected since the last element started."""
+
+        text = ''.join(self._data)
+        self._data.clear()
+        return text
+
+    def _start(self, name, attrs):
+        """Handle the start of an element."""
+
+        self._data.clear()
+        if name == 'dict':
+            container = self.dict_type()
+        elif name == 'array':
+            container = []
+        else:
+            return
+        self._add(container)
+        self._stack.append(container)
+
+    def _end(self, name):
+        """Handle the end of an element."""
+
+        if name in ('dict', 'array'):
+            if self._key is not None:
+                raise ValueError("missing value for key '%s' at line %d" % (self._key, self._parser.CurrentLineNumber))
+            self._stack.pop()
+        elif name == 'key':
+            if self._key is not None or not self._stack or not isinstance(self._stack[-1], dict):
+                raise ValueError("unexpected key at line %d" % self._parser.CurrentLineNumber)
+            self._key = self._text()
+        elif name == 'string':
+            self._add(self._text())
+        elif name == 'integer':
+            raw = self._text().strip()
+            self._add(int(raw, 16) if raw.startswith(('0x', '0X')) else int(raw))
+        elif name == 'real':
+            self._add(float(self._text()))
+        elif name == 'true':
+            self._add(True)
+        elif name == 'false':
+            self._add(False)
+        elif name == 'date':
+            value = convert_timestamp(self._text())
+            if value is None:
+                raise ValueError("invalid date at line %d" % self._parser.CurrentLineNumber)
+            self._add(value)
+        elif name == 'data':
+            self._add(base64.b64decode(self._text().encode('ascii')))
+
+    def feed(self, data):
+        """Parse the next chunk of the source (a string or bytes)."""
+
+        self._parser.Parse(data, False)
+
+    def close(self):
+        """Finish parsing and return the root object."""
+
+        self._parser.Parse(b'', True)
+        if not self._found_root:
+            raise plistlib.InvalidFileException()
+        return self.root
+
+
+def read_xml_plist(chunks, dict_type=collections.OrderedDict, check=None):
+    """
+    Read an XML PLIST from a string, bytes, or an iterable of either.
+
+    If given, `check` is called before each chunk to allow the read to be cancelled.
+    """
+
+    if isinstance(chunks, (str, bytes, bytearray)):
+        data = chunks
+        chunks = (data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE))
+    reader = XmlPlistReader(dict_type)
+    for chunk in chunks:
+        if check is not None:
+            check()
+        reader.feed(chunk)
+    return reader.close()
@@ -4,13 +4,15 @@ Serialized Data Converter.
 Licensed under MIT
 Copyright (c) 2012 - 2015 Isaac Muse <isaacmuse@gmail.com>
 """
-import sublime
 import datetime
+import io
 import yaml
 from collections import OrderedDict
 import re
+from .transform import pipeline
+from .fileio import CheckedWriter
 
-__all__ = ("read_yaml_from_view", "yaml_dumps")
+__all__ = ("read_yaml_from_view", "yaml_loads", "yaml_dumps", "write_yaml_to_file")
 
 # http://yaml.org/type/timestamp.html
 YAML_TIMESTAMP = re.compile(
@@ -35,89 +37,102 @@ YAML_TIMESTAMP = re.compile(
     ''',
     re.VERBOSE
 )
+# Length range of timestamp strings worth matching against `YAML_TIMESTAMP`
+TIMESTAMP_MIN = 8
+TIMESTAMP_MAX = 64
 
 
-def yaml_load(stream, loader=yaml.Loader):
+try:
+    # Use libyaml's loader when available as it is much faster.
+    from yaml import CLoader as BaseLoader
+except ImportError:  # pragma: no cover
+    from yaml import Loader as BaseLoader
+
+# libyaml's emitter escapes every character outside the Basic Multilingual Plane
+# (emoji and the like) even with `allow_unicode`, so keep the Python dumper.
+BaseDumper = yaml.Dumper
+
+# Characters that force a block scalar style
+BLOCK_CHARS = frozenset("\u000a\u000d\u001c\u001d\u001e\u0085\u2028\u2029")
+
+
+def binary_constructor(loader, node):
+    """Constructer to handle binary data."""
+
+    return bytes(loader.construct_yaml_binary(node))
+
+
+def timestamp_constructor(loader, node):
     """
-    Make all YAML dictionaries load as ordered Dicts.
+    Constructor for YAML timestamp.
 
-    http://stackoverflow.com/a/21912744/3609487
+    Timestamps are kept as dates, but timestamps with a timezone
+    are normalized to naive UTC datetimes like PLIST dates.
     """
 
-    def binary_constructor(self, node):
-        """Constructer to handle binary data."""
+    timestamp = loader.construct_yaml_timestamp(node)
+    if isinstance(timestamp, datetime.datetime) and timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return timestamp
 
-        return bytes(self.construct_yaml_binary(node))
 
-    def timestamp_constructor(self, node):
-        """Constructor for YAML timestamp."""
+def construct_mapping(loader, node):
+    """Keep dict ordered."""
 
-        timestamp = self.construct_yaml_timestamp(node)
-        if not isinstance(timestamp, datetime.datetime):
-            timestamp = str(timestamp)
-        else:
-            timestamp = '%(year)04d-%(month)02d-%(day)02dT%(hour)02d:%(minute)02d:%(second)02d%(microsecond)sZ' % {
-                "year": timestamp.year,
-                "month": timestamp.month,
-                "day": timestamp.day,
-                "hour": timestamp.hour,
-                "minute": timestamp.minute,
-                "second": timestamp.second,
-                "microsecond": ".%06d" % timestamp.microsecond if timestamp.microsecond != 0 else ""
-            }
-        return timestamp
-
-    def construct_mapping(loader, node):
-        """Keep dict ordered."""
-
-        loader.flatten_mapping(node)
-        return OrderedDict(loader.construct_pairs(node))
-
-    class Loader(loader):
-        """Custom loader."""
-
-    Loader.add_constructor(
-        yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG,
-        construct_mapping
-    )
+    if loader.check is not None:
+        loader.check()
+    loader.flatten_mapping(node)
+    return OrderedDict(loader.construct_pairs(node))
 
-    Loader.add_constructor(
-        "tag:yaml.org,2002:binary",
-        binary_constructor
-    )
 
-    Loader.add_constructor(
-        'tag:yaml.org,2002:timestamp',
-        timestamp_constructor
-    )
+class YamlLoader(BaseLoader):
+    """
+    Custom loader.
 
-    # Add !!Regex support during translation
-    Loader.add_constructor(
-        "tag:yaml.org,2002:regex",
-        Loader.construct_yaml_str
-    )
+    Make all YAML dictionaries load as ordered Dicts.
+    http://stackoverflow.com/a/21912744/3609487
+
+    If `check` is set, it is called for every mapping to allow the load to be cancelled.
+    """
+
+    check = None
+
+
+YamlLoader.add_constructor(
+    yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG,
+    construct_mapping
+)
+
+YamlLoader.add_constructor(
+    "tag:yaml.org,2002:binary",
+    binary_constructor
+)
+
+YamlLoader.add_constructor(
+    'tag:yaml.org,2002:timestamp',
+    timestamp_constructor
+)
 
-    return yaml.load(stream, Loader)
+# Add !!Regex support during translation
+YamlLoader.add_constructor(
+    "tag:yaml.org,2002:regex",
+    YamlLoader.construct_yaml_str
+)
 
 
-def yaml_dump(data, stream=None, dumper=yaml.Dumper, **kwargs):
-    """Special dumper wrapper to modify the yaml dumper."""
+class YamlDumper(BaseDumper):
+    """Custom dumper."""
 
-    def should_use_block(value):
+    def represent_scalar(self, tag, value, style=None):
         """
-        Control when to use block style.
+        Scalar.
 
+        Use block style for multi-line strings.
         http://stackoverflow.com/questions/8640959/how-can-i-control-what-scalar-form-pyyaml-uses-for-my-data
         """
-        for c in "\u000a\u000d\u001c\u001d\u001e\u0085\u2028\u2029":
-            if c in value:
-                return True
-        return False
 
-    def my_represent_scalar(self, tag, value, style=None):
-        """Scalar."""
         if style is None:
-            if should_use_block(value):
+            if not BLOCK_CHARS.isdisjoint(value):
                 style = '|'
             else:
                 style = self.default_style
@@ -127,30 +142,41 @@ def yaml_dump(data, stream=None, dumper=yaml.Dumper, **kwargs):
             self.represented_objects[self.alias_key] = node
         return node
 
-    class Dumper(dumper):
-        """Custom dumper."""
 
-    Dumper.represent_scalar = my_represent_scalar
+# Handle python dict
+YamlDumper.add_representer(
+    dict,
+    lambda self, data: self.represent_dict(data)
+)
 
-    # Handle python dict
-    Dumper.add_representer(
-        dict,
-        lambda self, data: self.represent_dict(data)
-    )
+# Handle binary data
+YamlDumper.add_representer(
+    bytes,
+    lambda self, data: self.represent_binary(data)
+)
 
-    # Handle binary data
-    Dumper.add_representer(
-        bytes,
-        lambda self, data: self.represent_binary(data.data)
-    )
+# Handle Ordered Dict
+YamlDumper.add_representer(
+    OrderedDict,
+    lambda self, data: self.represent_mapping('tag:yaml.org,2002:map', data.items())
+)
 
-    # Handle Ordered Dict
-    Dumper.add_representer(
-        OrderedDict,
-        lambda self, data: self.represent_mapping('tag:yaml.org,2002:map', data.items())
-    )
 
-    return yaml.dump(data, stream, Dumper, **kwargs)
+def yaml_load(stream, loader=YamlLoader, check=None):
+    """Load YAML."""
+
+    instance = loader(stream)
+    instance.check = check
+    try:
+        return instance.get_single_data()
+    finally:
+        instance.dispose()
+
+
+def yaml_dump(data, stream=None, dumper=YamlDumper, **kwargs):
+    """Dump YAML."""
+
+    return yaml.dump(data, stream, dumper, **kwargs)
 
 
 def convert_timestamp(obj):
@@ -158,7 +184,10 @@ def convert_timestamp(obj):
 
     delta = None
     time_stamp = None
-    m = YAML_TIMESTAMP.match(obj)
+    m = None
+    # Quickly rule out strings of the wrong length or without a dash after the year before running the full pattern.
+    if TIMESTAMP_MIN <= len(obj) <= TIMESTAMP_MAX and obj[4] == '-':
+        m = YAML_TIMESTAMP.fullmatch(obj)
     if m is not None:
         g = m.groupdict()
         # Date object
@@ -183,7 +212,7 @@ def convert_timestamp(obj):
             # Adjust for timezone
             if g["tz_sign"] is not None:
                 tz_hour = int(g["tz_hour"])
-                tz_minute = int(g["tz_minute"]) if g.tz_minute is not None else 0
+                tz_minute = int(g["tz_minute"]) if g["tz_minute"] is not None else 0
                 delta = datetime.timedelta(hours=tz_hour, minutes=tz_minute) * (-1 if g["tz_sign"] == "-" else 1)
             else:
                 delta = None
@@ -193,47 +222,89 @@ def convert_timestamp(obj):
     return time_stamp if delta is None else time_stamp - delta
 
 
+def yaml_to_step(strip_tabs=False, detect_timestamp=False):
+    """Get the node conversion for YAML output, or `None` if nothing needs converting."""
+
+    if not strip_tabs and not detect_timestamp:
+        return None
+
+    def convert(node):
+        """Convert a node."""
+
+        if isinstance(node, str):
+            converted = False
+            if detect_timestamp:
+                time_stamp = convert_timestamp(node)
+                if time_stamp is not None:
+                    node = time_stamp
+                    converted = True
+            if strip_tabs and not converted:
+                node = node.replace("\t", "    ").rstrip(" ")
+        return node
+
+    return convert
+
+
 def yaml_convert_to(obj, strip_tabs=False, detect_timestamp=False):
     """Convert specific serialized objects before converting to YAML."""
 
-    if isinstance(obj, dict):
-        for k, v in obj.items():
-            obj[k] = yaml_convert_to(v, strip_tabs, detect_timestamp)
-    elif isinstance(obj, list):
-        count = 0
-        for v in obj:
-            obj[count] = yaml_convert_to(v, strip_tabs, detect_timestamp)
-            count += 1
-    elif isinstance(obj, str):
-        if detect_timestamp:
-            converted = False
-            time_stamp = convert_timestamp(obj)
-            if time_stamp is not None:
-                obj = time_stamp
-                converted = True
-        elif strip_tabs and not converted:
-            obj = obj.replace("\t", "    ").rstrip(" ")
+    return pipeline(obj, yaml_to_step(strip_tabs, detect_timestamp))
 
-    return obj
+
+def yaml_loads(text, convert=True, check=None):
+    """
+    Read YAML from a string.
+
+    YAML needs no conversion after loading, `convert` is accepted
+    so that all formats can be loaded the same way. `check` is called
+    every so often to allow the read to be cancelled.
+    """
+
+    return yaml_load(text, check=check)
 
 
 def read_yaml_from_view(view):
     """Read YAML from a Sublime view."""
 
-    return yaml_load(
-        view.substr(
-            sublime.Region(0, view.size())
-        )
+    import sublime
+
+    return yaml_loads(view.substr(sublime.Region(0, view.size())))
+
+
+def yaml_dumps(
+    obj, default_flow_style=None, indent=4, strip_tabs=False, detect_timestamp=False, source_step=None, check=None
+):
+    """
+    Wrapper for yaml dump.
+
+    `source_step` is the node conversion of the format the data was read from (loaded
+    with `convert=False`) and is run in the same walk as the YAML conversion.
+    `check` is called every so often to allow the dump to be cancelled.
+    """
+
+    stream = io.StringIO()
+    yaml_dump(
+        pipeline(obj, source_step, yaml_to_step(strip_tabs, detect_timestamp), check=check),
+        stream if check is None else CheckedWriter(stream, check),
+        width=None,
+        indent=indent,
+        allow_unicode=True,
+        default_flow_style=default_flow_style
     )
+    return stream.getvalue()
 
 
-def yaml_dumps(obj, default_flow_style=None, indent=4, strip_tabs=False, detect_timestamp=False):
-    """Wrapper for yaml dump."""
+def write_yaml_to_file(
+    obj, fp, default_flow_style=None, indent=4, strip_tabs=False, detect_timestamp=False, source_step=None, check=None
+):
+    """Write YAML to a binary file handle as UTF-8 as it is emitted."""
 
-    return yaml_dump(
-        yaml_convert_to(obj, strip_tabs, detect_timestamp),
+    yaml_dump(
+        pipeline(obj, source_step, yaml_to_step(strip_tabs, detect_timestamp), check=check),
+        fp if check is None else CheckedWriter(fp, check),
         width=None,
         indent=indent,
         allow_unicode=True,
+        encoding='utf-8',
         default_flow_style=default_flow_style
     )
@@ -6,82 +6,313 @@ Copyright (c) 2012 - 2015 Isaac Muse <isaacmuse@gmail.com>
 """
 import sublime
 import sublime_plugin
-import codecs
-import re
 import traceback
+import time
+import itertools
 import os
-from SerializedDataConverter.lib.log import error_msg
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from SerializedDataConverter.lib.log import error_msg, trace_msg
 from SerializedDataConverter.lib import plist_includes as plist
-from SerializedDataConverter.lib import yaml_includes as yaml
-from SerializedDataConverter.lib import json_includes as json
+from SerializedDataConverter.lib import converter
+from SerializedDataConverter.lib import jobs
+from SerializedDataConverter.lib import fileio
+from SerializedDataConverter.lib.cache import ConversionCache
+from SerializedDataConverter.lib.extindex import SuffixIndex
+from SerializedDataConverter.lib.scheduler import Scheduler
+from SerializedDataConverter.lib.stats import ConversionStats
+from SerializedDataConverter.lib.tracing import Tracer, NULL_TRACER
 
 PACKAGE_SETTINGS = "serialized_data_converter.sublime-settings"
+STATUS_KEY = "serialized_data_converter"
+CACHE_FOLDER = "SerializedDataConverter"
+STATS_FILE = "SerializedDataConverter.stats.json"
+OUTPUT_FOLDER = "SerializedDataConverter.output"
+
+# Number of characters to insert into a view at a time
+BUFFER_CHUNK_SIZE = 1024 * 1024
+
+FORMAT_NAMES = {
+    "json": "JSON",
+    "yaml": "YAML",
+    "plist": "PLIST",
+    "bplist": "BPLIST"
+}
+
+# Extension tables for each conversion pair
+CONVERSION_EXT = {
+    ("plist", "json"): "plist_json_conversion_ext",
+    ("plist", "yaml"): "plist_yaml_conversion_ext",
+    ("bplist", "json"): "bplist_json_conversion_ext",
+    ("bplist", "yaml"): "bplist_yaml_conversion_ext",
+    ("bplist", "plist"): "bplist_plist_conversion_ext",
+    ("json", "yaml"): "json_yaml_conversion_ext"
+}
+
+# Extensions to fallback to when a file does not match an extension table
+DEFAULT_EXT = {
+    "json": ".JSON",
+    "yaml": ".YAML",
+    "plist": ".plist",
+    "bplist": ".plist"
+}
+
+
+_cache = None
+_ext_index = None
+_scheduler = None
+_stats = None
+# Output waiting to be inserted by `serialized_update_buffer`, by token
+_buffer_output = {}
+_buffer_tokens = itertools.count()
+
+
+def build_ext_index():
+    """
+    Build the extension indexes from the settings.
+
+    Each conversion pair is indexed under its `(src, out)` formats,
+    and `yaml_strip_tabs_from` and `convert_on_save` under their setting names.
+    """
+
+    global _ext_index
+
+    settings = sublime.load_settings(PACKAGE_SETTINGS)
+    index = {}
+    for (src, out), setting in CONVERSION_EXT.items():
+        table = [ext for ext in settings.get(setting, []) if src in ext and out in ext]
+        index[(src, out)] = SuffixIndex((ext[src], ext[out]) for ext in table)
+        index[(out, src)] = SuffixIndex((ext[out], ext[src]) for ext in table)
+    index["yaml_strip_tabs_from"] = SuffixIndex((ext, True) for ext in settings.get("yaml_strip_tabs_from", []))
+    index["convert_on_save"] = SuffixIndex(
+        (entry["ext"], entry.get("command", None)) for entry in settings.get("convert_on_save", []) if "ext" in entry
+    )
+    _ext_index = index
+
+
+def get_ext_index(key):
+    """Get an extension index."""
+
+    if _ext_index is None:
+        build_ext_index()
+    return _ext_index.get(key)
+
+
+def get_scheduler():
+    """Get the conversion scheduler."""
+
+    global _scheduler
+
+    max_workers = sublime.load_settings(PACKAGE_SETTINGS).get("conversion_workers", 2)
+    if _scheduler is None:
+        _scheduler = Scheduler(max_workers)
+    else:
+        _scheduler.max_workers = max(1, int(max_workers))
+    return _scheduler
+
+
+def get_cache(force=False):
+    """Get the conversion cache if it is enabled."""
+
+    global _cache
+
+    settings = sublime.load_settings(PACKAGE_SETTINGS)
+    if not force and not settings.get("conversion_cache", False):
+        return None
+
+    max_size = int(settings.get("conversion_cache_size", 64) * 1024 * 1024)
+    if _cache is None:
+        _cache = ConversionCache(os.path.join(sublime.cache_path(), CACHE_FOLDER), max_size)
+    else:
+        _cache.max_size = max_size
+    return _cache
+
+
+def get_stats_file():
+    """Get the file conversion statistics are saved to."""
+
+    return os.path.join(sublime.cache_path(), STATS_FILE)
+
+
+def get_stats():
+    """Get the conversion statistics, loading the saved statistics the first time if they are persisted."""
+
+    global _stats
+
+    if _stats is None:
+        _stats = ConversionStats()
+        if sublime.load_settings(PACKAGE_SETTINGS).get("persist_conversion_stats", False):
+            _stats.load(get_stats_file())
+    return _stats
+
+
+def get_output_folder():
+    """Get the folder large output is written to before it is opened."""
+
+    return os.path.join(sublime.cache_path(), OUTPUT_FOLDER)
+
+
+def clear_output_folder():
+    """Remove all output written to the output folder."""
+
+    shutil.rmtree(get_output_folder(), ignore_errors=True)
+
+
+def split_text(text, size=BUFFER_CHUNK_SIZE):
+    """Split text into chunks of at most `size` characters."""
+
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
+
+
+def stash_output(chunks):
+    """
+    Hold output for `serialized_update_buffer` and return the token to pass it instead of the text.
+
+    Command arguments are serialized as JSON when they are passed to Sublime,
+    so large output is handed to the command through a token instead.
+    """
 
+    token = next(_buffer_tokens)
+    _buffer_output[token] = chunks
+    return token
 
-def to_hex(value):
-    """Convert int value to hex string."""
 
-    return "%02x" % value
+def parse_command(command):
+    """
+    Split a conversion name like `json_to_bplist` into the command to run and its binary flags.
+
+    Binary PLIST conversions are run by the PLIST commands with `binary` (source)
+    or `save_binary` (target) enabled.
+    """
+
+    binary = False
+    save_binary = False
+    if command.startswith('bplist'):
+        command = command.replace('bplist', 'plist')
+        binary = True
+    elif command.endswith('bplist'):
+        command = command.replace('bplist', 'plist')
+        save_binary = True
+    return command, binary, save_binary
+
+
+def plugin_loaded():
+    """Build the extension indexes, and rebuild them when the settings change."""
+
+    settings = sublime.load_settings(PACKAGE_SETTINGS)
+    settings.clear_on_change(STATUS_KEY)
+    settings.add_on_change(STATUS_KEY, build_ext_index)
+    build_ext_index()
+    clear_output_folder()
+
+
+def plugin_unloaded():
+    """Remove output left in the output folder."""
+
+    clear_output_folder()
 
 
 class SerializedDataConverterListener(sublime_plugin.EventListener):
-    """Listener to convert certain files on save."""
+    """Listener to convert certain files on save, and to remove large output when its view closes."""
+
+    def on_close(self, view):
+        """Remove large output written to the output folder once its view is closed."""
+
+        filename = view.file_name()
+        folder = get_output_folder()
+        if filename is None or os.path.dirname(os.path.dirname(filename)) != folder:
+            return
+        try:
+            os.remove(filename)
+            os.rmdir(os.path.dirname(filename))
+        except OSError:
+            pass
 
     def on_post_save(self, view):
         """Convert after saves."""
 
-        ext2convert = self.get_save_ext()
         filename = view.file_name()
-        command = None
-        if filename is not None:
-            for converter in ext2convert:
-                ext = converter.get("ext", None)
-                if ext is not None and filename.lower().endswith(ext.lower()):
-                    command = converter.get("command", None)
-                    break
-
-        if command is not None:
-            self.convert(view, command)
+        m = get_ext_index("convert_on_save").match(filename) if filename is not None else None
+        command = m[1] if m is not None else None
 
-    def get_save_ext(self):
-        """Get the save extension."""
-
-        return sublime.load_settings(PACKAGE_SETTINGS).get("convert_on_save", [])
+        if isinstance(command, str):
+            self.convert(view, command)
+        elif command:
+            view.run_command("serialized_convert_many", {"commands": command, "trigger": "convert_on_save"})
 
     def convert(self, view, command):
         """Call the appropriate convert command."""
 
-        binary = False
-        save_binary = False
-        if command.startswith('bplist'):
-            command = command.replace('bplist', 'plist')
-            binary = True
-        elif command.endswith('bplist'):
-            command = command.replace('bplist', 'plist')
-            save_binary = True
-
+        command, binary, save_binary = parse_command(command)
         view.run_command(
             "serialized_%s" % command, {
                 "save_to_file": 'True',
                 "show_file": False,
                 "force": True,
                 "binary": binary,
-                'save_binary': save_binary
+                'save_binary': save_binary,
+                "trigger": "convert_on_save"
             }
         )
 
 
+class SerializedCancelConversionCommand(sublime_plugin.WindowCommand):
+    """Cancel in-flight conversions."""
+
+    def run(self):
+        """Cancel all in-flight conversions."""
+
+        count = jobs.cancel_all()
+        sublime.status_message("Cancelled %d conversion(s)" % count)
+
+    def is_enabled(self):
+        """Only enable when there is something to cancel."""
+
+        return jobs.has_jobs()
+
+
+class SerializedShowStatisticsCommand(sublime_plugin.WindowCommand):
+    """Show conversion statistics."""
+
+    def run(self):
+        """Show the statistics in a new scratch buffer."""
+
+        view = self.window.new_file()
+        view.set_name("Serialized Data Converter Statistics")
+        view.set_scratch(True)
+        view.run_command('serialized_update_buffer', {'text': get_stats().report()})
+        view.set_read_only(True)
+
+
+class SerializedClearCacheCommand(sublime_plugin.ApplicationCommand):
+    """Clear the conversion cache."""
+
+    def run(self):
+        """Remove all cached conversions."""
+
+        count = get_cache(force=True).clear()
+        sublime.status_message("Cleared %d cached conversion(s)" % count)
+
+
 class SerializedUpdateBufferCommand(sublime_plugin.TextCommand):
     """A command dedicated to updating a new serialized data view."""
 
-    def run(self, edit, text):
-        """Insert the provided text."""
+    def run(self, edit, text='', append=False, token=None):
+        """
+        Insert the provided text, or append it to the end of the view.
 
-        self.view.replace(
-            edit,
-            sublime.Region(0, self.view.size()),
-            text
-        )
+        If a `token` from `stash_output` is given, the stashed chunks are
+        inserted one after the other instead, all in the same undo step.
+        """
+
+        if not append:
+            self.view.replace(edit, sublime.Region(0, self.view.size()), text)
+        else:
+            self.view.insert(edit, self.view.size(), text)
+        if token is not None:
+            for chunk in _buffer_output.pop(token, ()):
+                self.view.insert(edit, self.view.size(), chunk)
 
 
 class _LanguageConverter(sublime_plugin.TextCommand):
@@ -89,6 +320,8 @@ class _LanguageConverter(sublime_plugin.TextCommand):
 
     lang = None
     default_lang = "Packages/Text/Plain text.tmLanguage"
+    src = None
+    dst = None
     errors = {
         "filewrite": "Could not write file!\n"
                      "Please see console for more info.",
@@ -126,6 +359,8 @@ class _LanguageConverter(sublime_plugin.TextCommand):
                        "Please see console for more info.",
         "plist2bplist": "Could not convert PLIST to Binary PLIST!\n"
                        "Please see console for more info.",
+        "plist2plist": "Could not convert PLIST to PLIST!\n"
+                       "Please see console for more info.",
         "binwrite": "Source view does not exist on disk, so save name and location cannot be determined.\n"
                     "You can convert and save to disk as an XML PLIST and then convert it to BPLIST."
     }
@@ -136,78 +371,117 @@ class _LanguageConverter(sublime_plugin.TextCommand):
         self.settings = sublime.load_settings(PACKAGE_SETTINGS)
         super().__init__(*args, **kwargs)
 
-    def set_syntax(self):
+    def set_syntax(self, job):
         """Set the view syntax."""
 
-        if self.output_view is not None:
+        if job.output_view is not None:
             # Get syntax language and set it
-            self.output_view.set_syntax_file(self.syntax)
+            job.output_view.set_syntax_file(job.syntax)
 
-    def write_file(self, edit, show_file):
+    def write_file(self, job):
         """Write data to a file if a location can be acquired else save to a view buffer."""
 
         errors = False
 
-        if self.save_filename is not None and os.path.exists(os.path.dirname(self.save_filename)):
+        if job.save_filename is not None and os.path.exists(os.path.dirname(job.save_filename)):
             # Save content to UTF file
             try:
-                if self.save_binary:
-                    with open(self.save_filename, "wb") as f:
-                        f.write(self.output)
-                else:
-                    with codecs.open(self.save_filename, "w", "utf-8") as f:
-                        f.write(self.output)
-                self.output = None
-                if show_file:
-                    self.output_view = self.view.window().open_file(self.save_filename)
+                if job.staged is not None:
+                    # Streamed output only replaces the target here, on the main thread, if the job is still wanted.
+                    job.check()
+                    with job.tracer.stage('replace'):
+                        fileio.commit_stream(job.staged, job.save_filename)
+                    job.staged = None
+                elif not job.streamed:
+                    with job.tracer.stage('write', source=len(job.output)):
+                        written = fileio.write_file(
+                            job.save_filename,
+                            job.output,
+                            compare=self.settings.get("skip_unchanged_output", True)
+                        )
+                    job.output = None
+                    job.unchanged = not written
+                if job.show_file:
+                    job.output_view = self.view.window().open_file(job.save_filename)
+            except jobs.JobCancelled:
+                raise
             except Exception:
                 errors = True
+                job.failed = True
                 error_msg(self.errors["filewrite"], traceback.format_exc())
-            if not errors and show_file:
-                self.set_syntax()
+            if not errors and job.show_file:
+                self.set_syntax(job)
         else:
             # Could not acquire a name that exists on disk
             # Fallback to buffer write
-            self.write_buffer(edit, force_new_buffer=True)
+            self.write_buffer(job, force_new_buffer=True)
 
-    def write_buffer(self, edit, force_new_buffer=False):
+    def write_temp_file(self, job):
+        """
+        Write large output to a file in the output folder and open it.
+
+        The file is loaded by Sublime straight from disk, so the output is not
+        passed through the plugin API and the new view has no undo history.
+        Output is kept in a folder per source view, so converting the same view
+        again overwrites the previous output instead of adding a new file.
+        """
+
+        if job.save_filename is not None:
+            name = os.path.basename(job.save_filename)
+        else:
+            name = "untitled" + DEFAULT_EXT[job.dst_fmt]
+        directory = os.path.join(get_output_folder(), str(self.view.id()))
+        os.makedirs(directory, exist_ok=True)
+        filename = os.path.join(directory, name)
+        with job.tracer.stage('write', source=len(job.output)):
+            fileio.write_file(filename, job.output)
+        job.output = None
+        job.output_view = self.view.window().open_file(filename)
+        self.set_syntax(job)
+
+    def is_large_output(self, job):
+        """Check if text output is large enough that it should be opened from a temporary file."""
+
+        limit = self.settings.get("large_output_file_size", 16)
+        return job.dst_fmt != 'bplist' and bool(limit) and len(job.output) > limit * 1024 * 1024
+
+    def write_buffer(self, job, force_new_buffer=False):
         """Write the data to a view buffer."""
 
-        new_buffer = bool(self.settings.get("open_in_new_buffer", False))
+        new_buffer = bool(self.settings.get("open_in_new_buffer", False)) or force_new_buffer
 
         # Save content to view buffer
         try:
-            self.output_view = self.view.window().new_file() if new_buffer or force_new_buffer else self.view
-            if new_buffer or force_new_buffer:
+            if new_buffer and self.is_large_output(job):
+                self.write_temp_file(job)
+                return
+
+            job.output_view = self.view.window().new_file() if new_buffer else self.view
+            if new_buffer:
                 # If a name can be acquired from the original view,
                 # give buffer a modified derivative of the name.
-                if self.save_filename is not None:
-                    self.output_view.set_name(os.path.basename(self.save_filename))
-            self.set_syntax()
-
-            if self.save_binary:
-                self.output_view.set_encoding('Hexadecimal')
-                bin_output = []
-                count = 0
-                for b in self.output:
-                    if count % 16 == 0 and count != 0:
-                        bin_output += ['\n', to_hex(b)]
-                    else:
-                        if count % 2 == 0 and count != 0:
-                            bin_output += [' ', to_hex(b)]
-                        else:
-                            bin_output.append(to_hex(b))
-                    count += 1
-                self.output = None
-                self.output_view.run_command('serialized_update_buffer', {'text': ''.join(bin_output)})
-                bin_output = None
-            else:
-                self.output_view.set_encoding('UTF-8')
-                self.output_view.run_command('serialized_update_buffer', {'text': self.output})
-                self.output = None
+                if job.save_filename is not None:
+                    job.output_view.set_name(os.path.basename(job.save_filename))
+            self.set_syntax(job)
+
+            # Output is inserted a chunk at a time in a single command, so it is never passed as a command argument.
+            with job.tracer.stage('buffer', source=len(job.output)):
+                if job.dst_fmt == 'bplist':
+                    job.output_view.set_encoding('Hexadecimal')
+                    chunks = job.tracer.iterate('hex', plist.convert_to_hex(job.output))
+                else:
+                    job.output_view.set_encoding('UTF-8')
+                    chunks = split_text(job.output)
+                token = stash_output(chunks)
+                try:
+                    job.output_view.run_command('serialized_update_buffer', {'token': token})
+                finally:
+                    _buffer_output.pop(token, None)
+                job.output = None
         except Exception:
+            job.failed = True
             error_msg(self.errors["bufferwrite"], traceback.format_exc())
-            self.output = None
+            job.output = None
 
     def is_enabled(self, **kwargs):
         """Determine if the command should be enabled."""
@@ -237,437 +511,476 @@ class _LanguageConverter(sublime_plugin.TextCommand):
             enabled = False
         return enabled
 
+    def get_ext_formats(self):
+        """Get the source and target format used to look up file extensions."""
+
+        return self.src_fmt, self.dst_fmt
+
     def get_output_file(self, filename):
         """Get output filename to save to."""
 
-        return None
-
-    def read_source(self):
-        """Read the source."""
+        src, out = self.get_ext_formats()
+        index = get_ext_index((src, out))
 
-        return False
+        # Try and find file ext in the ext table
+        m = index.match(filename) if index is not None else None
+        if m is not None:
+            name = m[0] + "." + m[1]
+        else:
+            # Could not find ext in table, replace current extension with default
+            name = os.path.splitext(filename)[0] + DEFAULT_EXT[out]
+        return name
 
-    def convert(self, edit):
-        """Convert the read data to the desired format."""
+    def get_strip_tabs(self):
+        """Check if tabs should be stripped from the source when converting to YAML."""
 
-        return False
+        filename = self.view.file_name()
+        return filename is not None and get_ext_index("yaml_strip_tabs_from").match(filename) is not None
 
-    def run(self, edit, **kwargs):
-        """Begin conversion."""
+    def get_dump_options(self):
+        """Get the dump options for the target format."""
 
-        self.binary = kwargs.get('binary', False)
-        self.save_binary = kwargs.get('save_binary', False)
-        self.syntax = self.settings.get(self.lang, self.default_lang) if self.lang is not None else self.default_lang
-        filename = self.view.file_name()
-        self.save_filename = self.get_output_file(filename) if filename is not None else None
-        if not self.read_source():
-            if not self.convert(edit):
-                if kwargs.get('save_to_file', False):
-                    self.write_file(edit, kwargs.get('show_file', True))
-                else:
-                    self.write_buffer(edit)
+        if self.dst_fmt == 'json':
+            options = {
+                "preserve_binary": self.settings.get("json_preserve_binary_data", True)
+            }
+        elif self.dst_fmt == 'yaml':
+            default_flow_style = None
+            flow_setting = self.settings.get("yaml_default_flow_style", None)
+            if flow_setting == "true":
+                default_flow_style = True
+            elif flow_setting == "false":
+                default_flow_style = False
+
+            options = {
+                "default_flow_style": default_flow_style,
+                "indent": self.settings.get("yaml_indent", 4),
+                "strip_tabs": self.get_strip_tabs(),
+                "detect_timestamp": self.settings.get("yaml_detect_timestamp", True)
+            }
+        else:
+            options = {
+                "detect_timestamp": self.settings.get("plist_detect_timestamp", True),
+                "none_handler": self.settings.get("plist_none_handler", "fail")
+            }
+        return options
 
+    def get_source_file(self):
+        """
+        Get the file to read the source from.
 
-##########################
-# Plist <-> YAML
-##########################
-class SerializedPlistToYamlCommand(_LanguageConverter):
-    """Convert PLIST to YAML."""
+        Binary PLISTs must be read from a hex view or straight from disk
+        as the encoding of a normal view can cause data to be lost.
+        """
 
-    lang = "yaml_language"
-    default_lang = "Packages/YAML/YAML.sublime-syntax"
+        filename = self.view.file_name()
+        if (
+            self.src_fmt == 'bplist' and self.view.encoding() != 'Hexadecimal' and
+            filename is not None and os.path.exists(filename)
+        ):
+            return filename
+        return None
 
-    def get_output_file(self, filename):
-        """Get output filename to save to."""
+    def get_source(self, tracer=NULL_TRACER):
+        """Get the raw source data from the view."""
 
-        name = None
+        with tracer.stage('source') as record:
+            if self.src_fmt == 'bplist' and self.view.encoding() == 'Hexadecimal':
+                source = plist.read_hex_from_view(self.view)
+            else:
+                source = self.view.substr(sublime.Region(0, self.view.size()))
+            record['output'] = len(source)
+        return source
 
-        if self.binary:
-            setting = 'bplist_yaml_conversion_ext'
-            src = 'bplist'
-        else:
-            setting = 'plist_yaml_conversion_ext'
-            src = 'plist'
+    def get_tracer(self):
+        """Get a tracer for a conversion if tracing is enabled."""
 
-        # Try and find file ext in the ext table
-        for ext in self.settings.get(setting, []):
-            m = re.match("^(.*)\\." + re.escape(ext[src]) + "$", filename, re.IGNORECASE)
-            if m is not None:
-                name = m.group(1) + "." + ext["yaml"]
-                break
-
-        # Could not find ext in table, replace current extension with default
-        if name is None:
-            name = os.path.splitext(filename)[0] + ".YAML"
-        return name
+        if not self.settings.get("conversion_trace", False):
+            return NULL_TRACER
+        filename = self.view.file_name()
+        return Tracer(
+            "%s to %s (%s)" % (
+                FORMAT_NAMES[self.src_fmt],
+                FORMAT_NAMES[self.dst_fmt],
+                os.path.basename(filename) if filename is not None else "untitled"
+            ),
+            file=filename
+        )
 
-    def read_source(self):
+    def read_source(self, job):
         """Read the source."""
 
         errors = False
-        ext_tbl = self.settings.get("yaml_strip_tabs_from", [])
-        filename = self.view.file_name()
-        self.strip_tabs = False
-        if filename is not None:
-            for ext in ext_tbl:
-                m = re.match("^(.*)\\." + re.escape(ext) + "$", filename, re.IGNORECASE)
-                if m is not None:
-                    self.strip_tabs = True
-                    break
         try:
-            # Ensure view buffer is in a UTF8 format.
-            # Wrap string in a file structure so it can be accessed by readPlist
-            # Read view buffer as PLIST and dump to Python dict
-            if self.binary and self.view.encoding() == 'Hexadecimal':
-                self.plist = plist.read_plist_from_hex_view(self.view)
-            elif self.binary and filename is not None and os.path.exists(filename):
-                self.plist = plist.read_plist_from_file(filename)
+            if job.source_file is not None:
+                job.data = converter.load_file(
+                    job.source_file, job.src_fmt, convert=False, tracer=job.tracer, check=job.check
+                )
             else:
-                self.plist = plist.read_plist_from_view(self.view)
+                job.data = converter.loads(
+                    job.source, job.src_fmt, convert=False, tracer=job.tracer, check=job.check
+                )
+            job.source = None
+        except jobs.JobCancelled:
+            raise
         except Exception:
             errors = True
-            error_type = 'view2bplist' if self.binary else 'view2plist'
-            error_msg(self.errors[error_type], traceback.format_exc())
+            job.failed = True
+            error_msg(self.errors["view2%s" % job.src_fmt], traceback.format_exc())
         return errors
 
-    def convert(self, edit):
+    def can_stream(self, job):
+        """Check if the output can be written straight to the target file as it is converted."""
+
+        return (
+            job.save_to_file and job.dst_fmt in converter.STREAM_FORMATS and
+            job.save_filename is not None and os.path.exists(os.path.dirname(job.save_filename))
+        )
+
+    def stream(self, job):
+        """
+        Convert the read data and write it straight to a temporary file next to the target.
+
+        The temporary file replaces the target when the job is finished on the main thread.
+        Unless `skip_unchanged_output` is disabled, the output is compared with the target
+        as it is written, and no temporary file is created if the target is unchanged.
+        """
+
+        with job.tracer.stage('save'):
+            job.staged = fileio.stage_stream(
+                job.save_filename,
+                lambda f: converter.dump(
+                    job.data, job.dst_fmt, f, src_fmt=job.src_fmt, tracer=job.tracer, check=job.check, **job.options
+                ),
+                compare=self.settings.get("skip_unchanged_output", True)
+            )
+        job.streamed = True
+        job.unchanged = job.staged is None
+        job.bytes_out = os.path.getsize(job.save_filename if job.unchanged else job.staged)
+
+    def convert(self, job):
         """Convert the read data to the desired format."""
 
         errors = False
         try:
-            if not errors:
-                # Convert Python dict to JSON buffer.
-                default_flow_style = None
-                flow_setting = self.settings.get("yaml_default_flow_style", None)
-                if flow_setting == "true":
-                    default_flow_style = True
-                elif flow_setting == "false":
-                    default_flow_style = False
-
-                # Convert Python dict to Yaml buffer.
-                self.output = yaml.yaml_dumps(
-                    self.plist,
-                    default_flow_style=default_flow_style,
-                    indent=self.settings.get("yaml_indent", 4),
-                    strip_tabs=self.strip_tabs,
-                    detect_timestamp=self.settings.get("yaml_detect_timestamp", True)
+            if self.can_stream(job):
+                self.stream(job)
+            else:
+                job.output = converter.dumps(
+                    job.data, job.dst_fmt, src_fmt=job.src_fmt, tracer=job.tracer, check=job.check, **job.options
                 )
-                self.plist = None
+                job.bytes_out = len(job.output)
+            job.data = None
+        except jobs.JobCancelled:
+            raise
+        except OSError:
+            errors = True
+            job.failed = True
+            error_msg(self.errors["filewrite"], traceback.format_exc())
         except Exception:
             errors = True
-            error_type = 'bplist2yaml' if self.binary else 'plist2yaml'
-            error_msg(self.errors[error_type], traceback.format_exc())
+            job.failed = True
+            error_msg(self.errors["%s2%s" % (job.src_fmt, job.dst_fmt)], traceback.format_exc())
         return errors
 
+    def update_status(self, job):
+        """Show the progress of the job in the status bar."""
 
-class SerializedYamlToPlistCommand(_LanguageConverter):
-    """Convert YAML to PLIST."""
-
-    lang = "plist_language"
-    default_lang = "Packages/XML/XML.sublime-syntax"
+        self.view.set_status(
+            STATUS_KEY,
+            "Converting %s to %s (%s)" % (FORMAT_NAMES[job.src_fmt], FORMAT_NAMES[job.dst_fmt], job.stage)
+        )
 
-    def get_output_file(self, filename):
-        """Get output filename to save to."""
+    def discard(self, job):
+        """Remove streamed output that did not replace the target (the job was cancelled or failed)."""
 
-        name = None
+        if job.staged is not None:
+            try:
+                fileio.discard_stream(job.staged)
+            except OSError:
+                print("Serialized Data Converter: Could not remove %s" % job.staged)
+            job.staged = None
+
+    def release(self, job):
+        """Let the next conversion to the job's target start, now that the target has been written."""
+
+        if job.schedule_key is not None:
+            get_scheduler().release(job.schedule_key)
+            job.schedule_key = None
+
+    def end(self, job):
+        """Clean up after a job completes or is cancelled."""
+
+        jobs.unregister(job)
+        self.discard(job)
+        self.release(job)
+        self.view.erase_status(STATUS_KEY)
+        self.report(job)
+        if job.cancelled:
+            sublime.status_message(
+                "Conversion of %s to %s cancelled" % (FORMAT_NAMES[job.src_fmt], FORMAT_NAMES[job.dst_fmt])
+            )
+        elif job.unchanged:
+            sublime.status_message("%s is unchanged" % os.path.basename(job.save_filename))
+        elif job.cached:
+            sublime.status_message(
+                "Converted %s to %s (cached)" % (FORMAT_NAMES[job.src_fmt], FORMAT_NAMES[job.dst_fmt])
+            )
 
-        if self.save_binary:
-            setting = 'bplist_yaml_conversion_ext'
-            out = 'bplist'
+    def report(self, job):
+        """Record the job in the conversion statistics, and report its trace if tracing is enabled."""
+
+        if job.cancelled:
+            outcome = "cancelled"
+        elif job.failed:
+            outcome = "failed"
+        elif job.unchanged:
+            outcome = "unchanged"
+        elif job.cached:
+            outcome = "cached"
         else:
-            setting = 'plist_yaml_conversion_ext'
-            out = 'plist'
-
-        # Try and find file ext in the ext table
-        for ext in self.settings.get(setting, []):
-            m = re.match("^(.*)\\." + re.escape(ext["yaml"]) + "$", filename, re.IGNORECASE)
-            if m is not None:
-                name = m.group(1) + "." + ext[out]
-                break
-
-        # Could not find ext in table, replace current extension with default
-        if name is None:
-            name = os.path.splitext(filename)[0] + ".plist"
-        return name
-
-    def read_source(self):
-        """Read the source."""
+            outcome = None
+        stats = get_stats()
+        stats.record(
+            "%s_to_%s" % (job.src_fmt, job.dst_fmt),
+            job.trigger,
+            time.perf_counter() - job.started,
+            job.bytes_in,
+            job.bytes_out,
+            outcome
+        )
+        if self.settings.get("persist_conversion_stats", False):
+            try:
+                stats.save(get_stats_file())
+            except Exception:
+                print("Serialized Data Converter: Could not save conversion statistics")
+                print(traceback.format_exc())
 
-        errors = False
+        if not job.tracer.enabled:
+            return
+        job.tracer.info.update(cancelled=job.cancelled, cached=job.cached, unchanged=job.unchanged)
         try:
-            # Strip comments and dangling commas from view buffer
-            # Read view buffer as JSON
-            # Dump data to Python dict
-            self.yaml = yaml.read_yaml_from_view(self.view)
+            trace_msg(job.tracer, self.settings.get("conversion_trace_log", None))
         except Exception:
-            errors = True
-            error_msg(self.errors["view2yaml"], traceback.format_exc())
-        return errors
+            print("Serialized Data Converter: Could not write conversion trace")
+            print(traceback.format_exc())
 
-    def convert(self, edit):
-        """Convert the read data to the desired format."""
+    def drop(self, job):
+        """Drop a job that was replaced by a newer one before it started."""
 
-        errors = False
-        try:
-            # Convert Python dict to PLIST buffer
-            if self.save_binary:
-                self.output = plist.plist_binary_dumps(
-                    self.yaml,
-                    detect_timestamp=self.settings.get("plist_detect_timestamp", True),
-                    none_handler=self.settings.get("plist_none_handler", "fail")
-                )
-            else:
-                self.output = plist.plist_dumps(
-                    self.yaml,
-                    detect_timestamp=self.settings.get("plist_detect_timestamp", True),
-                    none_handler=self.settings.get("plist_none_handler", "fail")
-                )
-            self.yaml = None
-        except Exception:
-            errors = True
-            error_type = 'yaml2bplist' if self.save_binary else 'yaml2plist'
-            error_msg(self.errors[error_type], traceback.format_exc())
-        return errors
+        # The job never held its key, so it must not release it.
+        job.schedule_key = None
+        job.cancel()
+        jobs.unregister(job)
 
-    def run(self, edit, **kwargs):
-        """Begin conversion."""
+    def get_cache_key(self, cache, job):
+        """Get the cache key for the job's source and conversion options."""
 
-        if kwargs.get('save_binary', False):
-            self.lang = 'bplist_language'
-            self.default_lang = 'Packages/Text/Plain text.tmLanguage'
+        if job.source_file is not None:
+            source_hash = cache.hash_file(job.source_file)
         else:
-            self.lang = 'plist_language'
-            self.default_lang = 'Packages/XML/XML.sublime-syntax'
-        super().run(edit, **kwargs)
-
+            source_hash = cache.hash_source(job.source)
+        return cache.make_key(source_hash, job.src_fmt, job.dst_fmt, job.options)
 
-##########################
-# Plist <-> JSON
-##########################
-class SerializedPlistToJsonCommand(_LanguageConverter):
-    """Convert PLIST to JSON."""
+    def read_cache(self, job):
+        """Try to get the output from the conversion cache, and return the key to store the output under."""
 
-    lang = "json_language"
-    default_lang = "Packages/JSON/JSON.sublime-syntax"
+        key = None
+        cache = get_cache()
+        if cache is not None:
+            try:
+                with job.tracer.stage('cache'):
+                    key = self.get_cache_key(cache, job)
+                    output = cache.get(key)
+                if output is not None:
+                    job.output = output if job.dst_fmt == 'bplist' else output.decode('utf-8')
+                    job.bytes_out = len(output)
+                    job.source = None
+                    job.cached = True
+            except Exception:
+                print("Serialized Data Converter: Could not read conversion cache")
+                print(traceback.format_exc())
+        return key
 
-    def get_output_file(self, filename):
-        """Get output filename to save to."""
-        name = None
+    def write_cache(self, job, key):
+        """Store the output in the conversion cache."""
 
-        if self.binary:
-            setting = 'bplist_json_conversion_ext'
-            src = 'bplist'
-        else:
-            setting = 'plist_json_conversion_ext'
-            src = 'plist'
+        cache = get_cache()
+        if cache is not None and key is not None:
+            try:
+                if job.streamed:
+                    cache.put_file(key, job.save_filename if job.staged is None else job.staged)
+                else:
+                    cache.put(key, job.output)
+            except Exception:
+                print("Serialized Data Converter: Could not write conversion cache")
+                print(traceback.format_exc())
 
-        # Try and find file ext in the ext table
-        for ext in self.settings.get(setting, []):
-            m = re.match("^(.*)\\." + re.escape(ext[src]) + "$", filename, re.IGNORECASE)
-            if m is not None:
-                name = m.group(1) + "." + ext["json"]
-                break
-
-        # Could not find ext in table, replace current extension with default
-        if name is None:
-            name = os.path.splitext(filename)[0] + ".JSON"
-        return name
+    def process(self, job):
+        """
+        Parse and convert the source.
 
-    def read_source(self):
-        """Read the source."""
+        Returns `True` if the output is ready to be written.
+        """
 
-        errors = False
+        errors = True
         try:
-            # Ensure view buffer is in a UTF8 format.
-            # Wrap string in a file structure so it can be accessed by readPlist
-            # Read view buffer as PLIST and dump to Python dict
-            filename = self.view.file_name()
-            if self.binary and self.view.encoding() == 'Hexadecimal':
-                self.plist = plist.read_plist_from_hex_view(self.view)
-            elif self.binary and filename is not None and os.path.exists(filename):
-                self.plist = plist.read_plist_from_file(filename)
+            key = self.read_cache(job)
+            if job.cached:
+                errors = False
             else:
-                self.plist = plist.read_plist_from_view(self.view)
-        except Exception:
-            errors = True
-            error_type = 'view2bplist' if self.binary else 'view2plist'
-            error_msg(self.errors[error_type], traceback.format_exc())
-        return errors
+                job.set_stage('parsing')
+                self.update_status(job)
+                if not self.read_source(job):
+                    job.set_stage('converting')
+                    self.update_status(job)
+                    errors = self.convert(job)
+                    if not errors:
+                        self.write_cache(job, key)
+        except jobs.JobCancelled:
+            pass
+        return not errors and not job.cancelled
+
+    def process_async(self, job):
+        """Parse and convert the source on the worker thread and hand the output back to the main thread."""
+
+        if self.process(job):
+            sublime.set_timeout(lambda: self.finish(job), 0)
+        else:
+            sublime.set_timeout(lambda: self.end(job), 0)
 
-    def convert(self, edit):
-        """Convert the read data to the desired format."""
+    def finish(self, job):
+        """Write the output to a file or view buffer."""
 
-        errors = False
         try:
-            if not errors:
-                self.output = json.json_dumps(
-                    self.plist,
-                    preserve_binary=self.settings.get("json_preserve_binary_data", True)
-                )
-                self.plist = None
-        except Exception:
-            errors = True
-            error_type = 'bplist2json' if self.binary else 'plist2json'
-            error_msg(self.errors[error_type], traceback.format_exc())
-        return errors
-
-
-class SerializedJsonToPlistCommand(_LanguageConverter):
-    """Convert JSON to PLIST."""
+            job.set_stage('writing')
+            self.update_status(job)
+            if job.save_to_file:
+                self.write_file(job)
+            else:
+                self.write_buffer(job)
+        except jobs.JobCancelled:
+            pass
+        self.end(job)
 
-    lang = "plist_language"
-    default_lang = "Packages/XML/XML.sublime-syntax"
+    def setup(self, **kwargs):
+        """Setup the source and target format from the command arguments."""
 
-    def get_output_file(self, filename):
-        """Get output filename to save to."""
+        self.binary = kwargs.get('binary', False)
+        self.save_binary = kwargs.get('save_binary', False)
+        self.src_fmt = 'bplist' if self.binary and self.src == 'plist' else self.src
+        self.dst_fmt = 'bplist' if self.save_binary and self.dst == 'plist' else self.dst
 
-        name = None
+    def make_job(self, source, source_file, **kwargs):
+        """Create a job to convert the source to the target format."""
 
-        if self.save_binary:
-            setting = 'bplist_json_conversion_ext'
-            out = 'bplist'
+        filename = self.view.file_name()
+        job = jobs.ConversionJob(
+            self.src_fmt,
+            self.dst_fmt,
+            source,
+            options=self.get_dump_options(),
+            save_filename=self.get_output_file(filename) if filename is not None else None,
+            owner=self.view.id(),
+            source_file=source_file
+        )
+        if self.dst_fmt == 'bplist':
+            job.syntax = self.settings.get('bplist_language', 'Packages/Text/Plain text.tmLanguage')
+        elif self.lang is not None:
+            job.syntax = self.settings.get(self.lang, self.default_lang)
         else:
-            setting = 'plist_json_conversion_ext'
-            out = 'plist'
+            job.syntax = self.default_lang
+        job.save_to_file = kwargs.get('save_to_file', False)
+        job.show_file = kwargs.get('show_file', True)
+        job.trigger = kwargs.get('trigger', 'command')
+        if source is not None:
+            job.bytes_in = len(source)
+        elif source_file is not None:
+            job.bytes_in = os.path.getsize(source_file)
+        job.output_view = None
+        return job
 
-        # Try and find file ext in the ext table
-        for ext in self.settings.get(setting, []):
-            m = re.match("^(.*)\\." + re.escape(ext["json"]) + "$", filename, re.IGNORECASE)
-            if m is not None:
-                name = m.group(1) + "." + ext[out]
-                break
-
-        # Could not find ext in table, replace current extension with default
-        if name is None:
-            name = os.path.splitext(filename)[0] + ".plist"
-        return name
+    def run(self, edit, **kwargs):
+        """Begin conversion."""
 
-    def read_source(self):
-        """Read the source."""
+        self.setup(**kwargs)
+        tracer = self.get_tracer()
 
-        errors = False
         try:
-            # Strip comments and dangling commas from view buffer
-            # Read view buffer as JSON
-            # Dump data to Python dict
-            self.json = json.read_json_from_view(self.view)
-
+            source_file = self.get_source_file()
+            source = self.get_source(tracer) if source_file is None else None
         except Exception:
-            errors = True
-            error_msg(self.errors["view2json"], traceback.format_exc())
-        return errors
+            error_msg(self.errors["view2%s" % self.src_fmt], traceback.format_exc())
+            return
+
+        job = self.make_job(source, source_file, **kwargs)
+        job.tracer = tracer
+        jobs.register(job)
+        if self.settings.get("async_conversion", True):
+            # Conversions to the same file replace each other if they have not started yet. The target is held
+            # until the job ends on the main thread, so the next conversion sees the target this one wrote.
+            job.schedule_key = job.save_filename if job.save_to_file and job.save_filename is not None else job
+            get_scheduler().submit(
+                job.schedule_key, lambda: self.process_async(job), lambda: self.drop(job), hold=True
+            )
+        elif self.process(job):
+            self.finish(job)
+        else:
+            self.end(job)
 
-    def convert(self, edit):
-        """Convert the read data to the desired format."""
 
-        errors = False
-        try:
-            # Convert Python dict to PLIST buffer
-            if self.save_binary:
-                self.output = plist.plist_binary_dumps(
-                    self.json,
-                    detect_timestamp=self.settings.get("plist_detect_timestamp", True),
-                    none_handler=self.settings.get("plist_none_handler", "fail")
-                )
-            else:
-                self.output = plist.plist_dumps(
-                    self.json,
-                    detect_timestamp=self.settings.get("plist_detect_timestamp", True),
-                    none_handler=self.settings.get("plist_none_handler", "fail")
-                )
-            self.json = None
-        except Exception:
-            errors = True
-            error_type = 'json2bplist' if self.save_binary else 'json2plist'
-            error_msg(self.errors[error_type], traceback.format_exc())
-        return errors
+##########################
+# Plist <-> YAML
+##########################
+class SerializedPlistToYamlCommand(_LanguageConverter):
+    """Convert PLIST to YAML."""
 
-    def run(self, edit, **kwargs):
-        """Begin conversion."""
+    lang = "yaml_language"
+    default_lang = "Packages/YAML/YAML.sublime-syntax"
+    src = "plist"
+    dst = "yaml"
 
-        if kwargs.get('save_binary', False):
-            self.lang = 'bplist_language'
-            self.default_lang = 'Packages/Text/Plain text.tmLanguage'
-        else:
-            self.lang = 'plist_language'
-            self.default_lang = 'Packages/XML/XML.sublime-syntax'
-        super().run(edit, **kwargs)
+
+class SerializedYamlToPlistCommand(_LanguageConverter):
+    """Convert YAML to PLIST."""
+
+    lang = "plist_language"
+    default_lang = "Packages/XML/XML.sublime-syntax"
+    src = "yaml"
+    dst = "plist"
 
 
 ##########################
-# YAML <-> JSON
+# Plist <-> JSON
 ##########################
-class SerializedJsonToYamlCommand(_LanguageConverter):
-    """Convert JSON to YAML."""
+class SerializedPlistToJsonCommand(_LanguageConverter):
+    """Convert PLIST to JSON."""
 
-    lang = "yaml_language"
-    default_lang = "Packages/YAML/YAML.sublime-syntax"
+    lang = "json_language"
+    default_lang = "Packages/JSON/JSON.sublime-syntax"
+    src = "plist"
+    dst = "json"
 
-    def get_output_file(self, filename):
-        """Get output filename to save to."""
-        name = None
 
-        # Try and find file ext in the ext table
-        for ext in self.settings.get("json_yaml_conversion_ext", []):
-            m = re.match("^(.*)\\." + re.escape(ext["json"]) + "$", filename, re.IGNORECASE)
-            if m is not None:
-                name = m.group(1) + "." + ext["yaml"]
-                break
-
-        # Could not find ext in table, replace current extension with default
-        if name is None:
-            name = os.path.splitext(filename)[0] + ".YAML"
-        return name
+class SerializedJsonToPlistCommand(_LanguageConverter):
+    """Convert JSON to PLIST."""
 
-    def read_source(self):
-        """Read the source."""
+    lang = "plist_language"
+    default_lang = "Packages/XML/XML.sublime-syntax"
+    src = "json"
+    dst = "plist"
 
-        errors = False
-        ext_tbl = self.settings.get("yaml_strip_tabs_from", [])
-        filename = self.view.file_name()
-        self.strip_tabs = False
-        if filename is not None:
-            for ext in ext_tbl:
-                m = re.match("^(.*)\\." + re.escape(ext) + "$", filename, re.IGNORECASE)
-                if m is not None:
-                    self.strip_tabs = True
-                    break
-        try:
-            # Ensure view buffer is in a UTF8 format.
-            # Wrap string in a file structure so it can be accessed by readPlist
-            # Read view buffer as PLIST and dump to Python dict
-            self.json = json.read_json_from_view(self.view)
-        except Exception:
-            errors = True
-            error_msg(self.errors["view2json"], traceback.format_exc())
-        return errors
 
-    def convert(self, edit):
-        """Convert the read data to the desired format."""
+##########################
+# YAML <-> JSON
+##########################
+class SerializedJsonToYamlCommand(_LanguageConverter):
+    """Convert JSON to YAML."""
 
-        errors = False
-        try:
-            if not errors:
-                # Convert Python dict to JSON buffer.
-                default_flow_style = None
-                flow_setting = self.settings.get("yaml_default_flow_style", None)
-                if flow_setting == "true":
-                    default_flow_style = True
-                elif flow_setting == "false":
-                    default_flow_style = False
-
-                self.output = yaml.yaml_dumps(
-                    self.json,
-                    default_flow_style=default_flow_style,
-                    indent=self.settings.get("yaml_indent", 4),
-                    strip_tabs=self.strip_tabs,
-                    detect_timestamp=self.settings.get("yaml_detect_timestamp", True)
-                )
-                self.json = None
-        except Exception:
-            errors = True
-            error_msg(self.errors["json2yaml"], traceback.format_exc())
-        return errors
+    lang = "yaml_language"
+    default_lang = "Packages/YAML/YAML.sublime-syntax"
+    src = "json"
+    dst = "yaml"
 
 
 class SerializedYamlToJsonCommand(_LanguageConverter):
@@ -675,144 +988,201 @@ class SerializedYamlToJsonCommand(_LanguageConverter):
 
     lang = "json_language"
     default_lang = "Packages/JSON/JSON.sublime-syntax"
+    src = "yaml"
+    dst = "json"
 
-    def get_output_file(self, filename):
-        """Get output filename to save to."""
 
-        name = None
+##########################
+# BPLIST <-> PLIST
+##########################
+class SerializedPlistToPlistCommand(_LanguageConverter):
+    """Convert BPLIST <-> PLIST."""
 
-        # Try and find file ext in the ext table
-        for ext in self.settings.get("json_yaml_conversion_ext", []):
-            m = re.match("^(.*)\\." + re.escape(ext["yaml"]) + "$", filename, re.IGNORECASE)
-            if m is not None:
-                name = m.group(1) + "." + ext["json"]
-                break
-
-        # Could not find ext in table, replace current extension with default
-        if name is None:
-            name = os.path.splitext(filename)[0] + ".JSON"
-        return name
+    lang = 'plist_language'
+    default_lang = 'Packages/XML/XML.sublime-syntax'
+    src = "plist"
+    dst = "plist"
 
-    def read_source(self):
-        """Read the source."""
+    def get_ext_formats(self):
+        """Get the source and target format used to look up file extensions."""
 
-        errors = False
-        try:
-            # Strip comments and dangling commas from view buffer
-            # Read view buffer as JSON
-            # Dump data to Python dict
-            self.yaml = yaml.read_yaml_from_view(self.view)
-        except Exception:
-            errors = True
-            error_msg(self.errors["view2yaml"], traceback.format_exc())
-        return errors
+        return ('bplist', 'plist') if self.binary else ('plist', 'bplist')
 
-    def convert(self, edit):
-        """Convert the read data to the desired format."""
 
-        errors = False
-        try:
-            # Convert Python dict to PLIST buffer
-            self.output = json.json_dumps(
-                self.yaml,
-                preserve_binary=self.settings.get("json_preserve_binary_data", True)
-            )
-            self.yaml = None
-        except Exception:
-            errors = True
-            error_msg(self.errors["yaml2json"], traceback.format_exc())
-        return errors
+# Conversion commands by conversion name (`yaml_to_plist`)
+CONVERTERS = {"%s_to_%s" % (cls.src, cls.dst): cls for cls in _LanguageConverter.__subclasses__()}
 
 
 ##########################
-# BPLIST <-> PLIST
+# Multiple targets
 ##########################
-class SerializedPlistToPlistCommand(_LanguageConverter):
-    """Convert BPLIST <-> PLIST."""
-
-    lang = 'plist_language'
-    default_lang = 'Packages/Text/Plain text.tmLanguage'
+class SerializedConvertManyCommand(sublime_plugin.TextCommand):
+    """
+    Convert the view to several formats at once.
 
-    def get_output_file(self, filename):
-        """Get output filename to save to."""
+    Conversions that share a source format parse the source once,
+    and the targets are then dumped in parallel on a thread pool.
+    """
 
-        name = None
+    def __init__(self, *args, **kwargs):
+        """General setup."""
 
-        # Try and find file ext in the ext table
-        if self.binary:
-            src = 'bplist'
-            out = 'plist'
-            default_out = '.plist'
-        else:
-            src = 'plist'
-            out = 'bplist'
-            default_out = '.plist'
+        self.settings = sublime.load_settings(PACKAGE_SETTINGS)
+        super().__init__(*args, **kwargs)
 
-        for ext in self.settings.get('bplist_plist_conversion_ext', []):
-            m = re.match("^(.*)\\." + re.escape(ext[src]) + "$", filename, re.IGNORECASE)
-            if m is not None:
-                name = m.group(1) + "." + ext[out]
-                break
+    def update_status(self, group, stage):
+        """Show the progress of the group in the status bar."""
 
-        # Could not find ext in table, replace current extension with default
-        if name is None:
-            name = os.path.splitext(filename)[0] + default_out
+        self.view.set_status(
+            STATUS_KEY,
+            "Converting %s to %s (%s)" % (
+                FORMAT_NAMES[group[0][1].src_fmt],
+                ", ".join(FORMAT_NAMES[job.dst_fmt] for _, job in group),
+                stage
+            )
+        )
 
-        return name
+    def end(self, group, ready):
+        """Clean up after the group completes or is cancelled, and report on all targets at once."""
 
-    def read_source(self):
-        """Read the source."""
+        for target, job in group:
+            jobs.unregister(job)
+            target.discard(job)
+            target.release(job)
+            target.report(job)
+        self.view.erase_status(STATUS_KEY)
 
-        errors = False
+        src = FORMAT_NAMES[group[0][1].src_fmt]
+        if any(job.cancelled for _, job in group):
+            sublime.status_message("Conversion of %s cancelled" % src)
+        else:
+            results = []
+            for _, job in ready:
+                name = FORMAT_NAMES[job.dst_fmt]
+                if job.unchanged:
+                    name += " (unchanged)"
+                elif job.cached:
+                    name += " (cached)"
+                results.append(name)
+            message = "Converted %s to %s" % (src, ", ".join(results)) if results else "Could not convert %s" % src
+            if results and len(results) < len(group):
+                message += " (%d failed)" % (len(group) - len(results))
+            sublime.status_message(message)
+
+    def drop(self, group):
+        """Drop a group that was replaced by a newer one before it started."""
+
+        for target, job in group:
+            target.drop(job)
+
+    def process(self, group):
+        """Parse the source once and dump all targets, returning the targets whose output is ready to be written."""
+
+        ready = []
         try:
-            # Ensure view buffer is in a UTF8 format.
-            # Wrap string in a file structure so it can be accessed by readPlist
-            # Read view buffer as PLIST and dump to Python dict
-            filename = self.view.file_name()
-            if self.binary and self.view.encoding() == 'Hexadecimal':
-                self.plist = plist.read_plist_from_hex_view(self.view)
-            elif self.binary and filename is not None and os.path.exists(filename):
-                self.plist = plist.read_plist_from_file(filename)
-            else:
-                self.plist = plist.read_plist_from_view(self.view)
-        except Exception:
-            errors = True
-            error_type = 'view2bplist' if self.binary else 'view2plist'
-            error_msg(self.errors[error_type], traceback.format_exc())
-        return errors
+            pending = []
+            for target, job in group:
+                key = target.read_cache(job)
+                if job.cached:
+                    ready.append((target, job))
+                else:
+                    pending.append((target, job, key))
+
+            if pending:
+                for _, job, _ in pending:
+                    job.set_stage('parsing')
+                self.update_status(group, 'parsing')
+                first_target, first_job = pending[0][:2]
+                shared = len(first_job.tracer.stages)
+                if first_target.read_source(first_job):
+                    for _, job, _ in pending:
+                        job.failed = True
+                else:
+                    # Conversions leave the loaded tree as is, so every target can share it.
+                    for _, job, _ in pending:
+                        if job is not first_job:
+                            job.tracer.add(first_job.tracer.stages[shared:])
+                        job.data = first_job.data
+                        job.source = None
+                        job.set_stage('converting')
+                    self.update_status(group, 'converting')
+                    workers = min(len(pending), os.cpu_count() or 1)
+                    with ThreadPoolExecutor(max_workers=workers) as pool:
+                        errors = list(pool.map(lambda p: p[0].convert(p[1]), pending))
+                    for (target, job, key), error in zip(pending, errors):
+                        if not error:
+                            target.write_cache(job, key)
+                            ready.append((target, job))
+        except jobs.JobCancelled:
+            ready = []
+        return [(target, job) for target, job in ready if not job.cancelled]
+
+    def process_async(self, group):
+        """Parse and convert the source on the worker thread and hand the output back to the main thread."""
+
+        ready = self.process(group)
+        sublime.set_timeout(lambda: self.finish(group, ready), 0)
+
+    def finish(self, group, ready):
+        """Write the output of each target to a file or view buffer."""
+
+        if ready:
+            self.update_status(group, 'writing')
+        for target, job in ready:
+            try:
+                job.set_stage('writing')
+                if job.save_to_file:
+                    target.write_file(job)
+                else:
+                    target.write_buffer(job)
+            except jobs.JobCancelled:
+                pass
+        self.end(group, ready)
 
-    def convert(self, edit):
-        """Convert the read data to the desired format."""
+    def start(self, targets, **kwargs):
+        """Read the source once and start converting it to all targets."""
 
-        errors = False
+        first = targets[0]
+        tracers = [target.get_tracer() for target in targets]
         try:
-            # Convert Python dict to PLIST buffer
-            if self.save_binary:
-                self.output = plist.plist_binary_dumps(
-                    self.plist,
-                    detect_timestamp=self.settings.get("plist_detect_timestamp", True),
-                    none_handler=self.settings.get("plist_none_handler", "fail")
-                )
-            else:
-                self.output = plist.plist_dumps(
-                    self.plist,
-                    detect_timestamp=self.settings.get("plist_detect_timestamp", True),
-                    none_handler=self.settings.get("plist_none_handler", "fail")
-                )
-            self.plist = None
+            source_file = first.get_source_file()
+            source = first.get_source(tracers[0]) if source_file is None else None
         except Exception:
-            errors = True
-            error_type = "bplist2plist" if self.binary else 'plist2bplist'
-            error_msg(self.errors[error_type], traceback.format_exc())
-        return errors
-
-    def run(self, edit, **kwargs):
-        """Begin conversion."""
-
-        if kwargs.get('save_binary', False):
-            self.lang = 'bplist_language'
-            self.default_lang = 'Packages/Text/Plain text.tmLanguage'
+            error_msg(first.errors["view2%s" % first.src_fmt], traceback.format_exc())
+            return
+
+        group = [(target, target.make_job(source, source_file, **kwargs)) for target in targets]
+        for (_, job), tracer in zip(group, tracers):
+            if tracer is not tracers[0]:
+                tracer.add(tracers[0].stages)
+            job.tracer = tracer
+            jobs.register(job)
+        if self.settings.get("async_conversion", True):
+            # Reserve each target the way single conversions do, so they never write the same file at once.
+            for _, job in group:
+                job.schedule_key = job.save_filename if job.save_to_file and job.save_filename is not None else job
+            get_scheduler().submit(
+                [job.schedule_key for _, job in group],
+                lambda: self.process_async(group),
+                lambda: self.drop(group),
+                hold=True
+            )
         else:
-            self.lang = 'plist_language'
-            self.default_lang = 'Packages/XML/XML.sublime-syntax'
-        super().run(edit, **kwargs)
+            self.finish(group, self.process(group))
+
+    def run(self, edit, commands, save_to_file=True, show_file=False, trigger="command"):
+        """Begin converting to all targets, grouping the targets by source format."""
+
+        groups = {}
+        for command in commands:
+            name, binary, save_binary = parse_command(command)
+            cls = CONVERTERS.get(name)
+            if cls is None:
+                print("Serialized Data Converter: Unknown conversion '%s'" % command)
+                continue
+            target = cls(self.view)
+            target.setup(binary=binary, save_binary=save_binary)
+            groups.setdefault(target.src_fmt, []).append(target)
+
+        for targets in groups.values():
+            self.start(targets, save_to_file=save_to_file, show_file=show_file, trigger=trigger)
@@ -0,0 +1,71 @@
+"""Test the conversion cache."""
+import unittest
+import os
+import shutil
+import tempfile
+import time
+from lib.cache import ConversionCache
+
+
+class TestCache(unittest.TestCase):
+    """Test the conversion cache."""
+
+    def setUp(self):
+        """Setup a temporary cache."""
+
+        self.directory = tempfile.mkdtemp()
+        self.cache = ConversionCache(os.path.join(self.directory, 'cache'), 100)
+
+    def tearDown(self):
+        """Remove the temporary cache."""
+
+        shutil.rmtree(self.directory)
+
+    def key(self, source, **options):
+        """Make a key."""
+
+        return self.cache.make_key(self.cache.hash_source(source), 'json', 'yaml', options)
+
+    def test_keys(self):
+        """Test that keys depend on the source and the options."""
+
+        self.assertEqual(self.key('{}', indent=4), self.key(b'{}', indent=4))
+        self.assertNotEqual(self.key('{}', indent=4), self.key('{}', indent=2))
+        self.assertNotEqual(self.key('{}', indent=4), self.key('[]', indent=4))
+
+    def test_get_put(self):
+        """Test storing and getting output."""
+
+        key = self.key('{}')
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, '{}\n')
+        self.assertEqual(self.cache.get(key), b'{}\n')
+
+    def test_put_file(self):
+        """Test storing output from a file."""
+
+        filename = os.path.join(self.directory, 'output')
+        with open(filename, 'wb') as f:
+            f.write(b'{}\n')
+        key = self.key('{}')
+        self.cache.put_file(key, filename)
+        self.assertEqual(self.cache.get(key), b'{}\n')
+
+    def test_evict(self):
+        """Test that the least recently used entries are evicted."""
+
+        keys = [self.key(str(i)) for i in range(3)]
+        for key in keys:
+            self.cache.put(key, b'x' * 40)
+            # Make sure modification times differ.
+            time.sleep(0.01)
+        self.assertIsNone(self.cache.get(keys[0]))
+        self.assertIsNotNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+    def test_clear(self):
+        """Test clearing the cache."""
+
+        self.cache.put(self.key('{}'), b'{}')
+        self.assertEqual(self.cache.clear(), 1)
+        self.assertIsNone(self.cache.get(self.key('{}')))
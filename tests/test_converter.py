@@ -0,0 +1,185 @@
+"""Test conversion core."""
+import unittest
+import copy
+import datetime
+import io
+import plistlib
+from lib import converter
+
+JSON_SOURCE = '''{
+    // A comment
+    "name": "Test",
+    "scopeName": "source.test",
+    "patterns": [
+        {"match": "\\\\b(if|else)\\\\b", "name": "keyword.control.test"},
+        {"begin": "\\"", "end": "\\"", "name": "string.quoted.test"},
+    ],
+    "data": {"!!python/object:plistlib.Data": "U29tZSBkYXRh"},
+    "date": "2015-01-02T03:04:05Z"
+}
+'''
+
+YAML_SOURCE = '''name: Test
+scopeName: source.test
+patterns:
+-   match: \\b(if|else)\\b
+    name: keyword.control.test
+data: !!binary |
+    U29tZSBkYXRh
+'''
+
+
+class TestConverter(unittest.TestCase):
+    """Test conversion core."""
+
+    def test_json_loads(self):
+        """Test JSON loads strips comments and dangling commas."""
+
+        obj = converter.loads(JSON_SOURCE, 'json')
+        self.assertEqual(list(obj.keys()), ['name', 'scopeName', 'patterns', 'data', 'date'])
+        self.assertEqual(len(obj['patterns']), 2)
+        self.assertEqual(obj['data'], b'Some data')
+
+    def test_yaml_loads(self):
+        """Test YAML loads."""
+
+        obj = converter.loads(YAML_SOURCE.encode('utf-8'), 'yaml')
+        self.assertEqual(obj['patterns'][0]['match'], '\\b(if|else)\\b')
+        self.assertEqual(obj['data'], b'Some data')
+
+    def test_json_to_plist(self):
+        """Test JSON to PLIST."""
+
+        output = converter.convert(JSON_SOURCE, 'json', 'plist', detect_timestamp=True)
+        obj = plistlib.loads(output.encode('utf-8'))
+        self.assertEqual(obj['name'], 'Test')
+        self.assertEqual(obj['data'], b'Some data')
+        self.assertEqual(obj['date'], datetime.datetime(2015, 1, 2, 3, 4, 5))
+
+    def test_json_to_bplist(self):
+        """Test JSON to binary PLIST."""
+
+        output = converter.convert(JSON_SOURCE, 'json', 'bplist')
+        self.assertTrue(output.startswith(b'bplist00'))
+        self.assertEqual(converter.loads(output, 'bplist')['scopeName'], 'source.test')
+
+    def test_plist_to_json(self):
+        """Test PLIST to JSON and back."""
+
+        plist = converter.convert(JSON_SOURCE, 'json', 'plist')
+        output = converter.convert(plist, 'plist', 'json', preserve_binary=True)
+        self.assertEqual(converter.loads(output, 'json')['data'], b'Some data')
+
+    def test_yaml_round_trip(self):
+        """Test JSON to YAML and back."""
+
+        output = converter.convert(JSON_SOURCE, 'json', 'yaml', strip_tabs=True, detect_timestamp=False)
+        obj = converter.loads(output, 'yaml')
+        self.assertEqual(obj['patterns'][1]['begin'], '"')
+        self.assertEqual(obj['data'], b'Some data')
+
+    def test_yaml_astral(self):
+        """Test that characters outside the Basic Multilingual Plane are written as is."""
+
+        text = "smile \U0001F600 and \U0001D11E"
+        output = converter.dumps({"a": text}, 'yaml', default_flow_style=False)
+        self.assertEqual(output, 'a: %s\n' % text)
+        self.assertEqual(converter.convert(converter.dumps({"a": text}, 'json'), 'json', 'yaml'), '{a: %s}\n' % text)
+        self.assertEqual(converter.loads(output, 'yaml')['a'], text)
+
+        fp = io.BytesIO()
+        converter.dump({"a": text}, 'yaml', fp, default_flow_style=False)
+        self.assertEqual(fp.getvalue().decode('utf-8'), output)
+
+    def test_unsupported_format(self):
+        """Test unsupported formats."""
+
+        with self.assertRaises(converter.ConverterException):
+            converter.convert(JSON_SOURCE, 'json', 'toml')
+
+    def test_too_deep(self):
+        """Test that data nested deeper than the writers can handle is reported as a converter error."""
+
+        source = '{"a": ' * 900 + '1' + '}' * 900
+        for fmt in ('yaml', 'plist'):
+            with self.assertRaises(converter.ConverterException) as cm:
+                converter.convert(source, 'json', fmt)
+            self.assertIn("nested too deeply", str(cm.exception))
+            with self.assertRaises(converter.ConverterException):
+                converter.dump(converter.loads(source, 'json'), fmt, io.BytesIO())
+
+    def test_json_strict_first(self):
+        """Test that strict and relaxed JSON parse the same."""
+
+        strict = '{"a": [1, 2], "b": "// not a comment,]"}'
+        relaxed = '{"a": [1, 2,], // comment\n "b": "// not a comment,]"}'
+        self.assertEqual(converter.loads(strict, 'json'), converter.loads(relaxed, 'json'))
+
+    def test_yaml_block_style(self):
+        """Test that multi-line strings are dumped in block style."""
+
+        output = converter.dumps({"a": "line1\nline2"}, 'yaml', default_flow_style=False)
+        self.assertEqual(output, 'a: |-\n    line1\n    line2\n')
+        self.assertEqual(converter.loads(output, 'yaml')['a'], "line1\nline2")
+
+    def test_single_walk(self):
+        """Test that the fused conversion matches converting each side separately."""
+
+        for src, dst, options in (
+            ('json', 'plist', {"detect_timestamp": True, "none_handler": "strip"}),
+            ('json', 'yaml', {"strip_tabs": True, "detect_timestamp": True}),
+            ('plist', 'json', {"preserve_binary": True}),
+            ('plist', 'yaml', {"detect_timestamp": False}),
+        ):
+            data = converter.convert(JSON_SOURCE, 'json', src) if src != 'json' else JSON_SOURCE
+            expected = converter.dumps(converter.loads(data, src), dst, **options)
+            self.assertEqual(converter.convert(data, src, dst, **options), expected)
+
+    def test_typed_dates(self):
+        """Test that dates are carried through conversions as dates."""
+
+        source = "a: 2015-01-02T03:04:05+01:00\nb: 2015-01-02\nc: '2015-01-02T03:04:05Z'\n"
+        obj = converter.loads(source, 'yaml')
+        self.assertEqual(obj['a'], datetime.datetime(2015, 1, 2, 2, 4, 5))
+        self.assertEqual(obj['b'], datetime.date(2015, 1, 2))
+
+        obj = plistlib.loads(converter.convert(source, 'yaml', 'plist', detect_timestamp=True).encode('utf-8'))
+        self.assertEqual(obj['a'], datetime.datetime(2015, 1, 2, 2, 4, 5))
+        self.assertEqual(obj['b'], datetime.datetime(2015, 1, 2))
+        # Quoted strings are strings in YAML, so they are not scanned for timestamps.
+        self.assertEqual(obj['c'], '2015-01-02T03:04:05Z')
+
+        output = converter.convert(converter.convert(source, 'yaml', 'bplist'), 'bplist', 'json')
+        obj = converter.loads(output, 'json')
+        self.assertEqual(obj['a'], '2015-01-02T02:04:05Z')
+        self.assertEqual(obj['b'], '2015-01-02T00:00:00Z')
+
+    def test_shared_tree(self):
+        """Test that one loaded tree can be dumped to every format without being changed."""
+
+        for src in converter.FORMATS:
+            data = converter.convert(JSON_SOURCE, 'json', src) if src != 'json' else JSON_SOURCE
+            obj = converter.loads(data, src, convert=False)
+            snapshot = copy.deepcopy(obj)
+            targets = [
+                ('json', {"preserve_binary": True}),
+                ('yaml', {"strip_tabs": True, "detect_timestamp": True}),
+                ('plist', {"detect_timestamp": True, "none_handler": "strip"}),
+                ('bplist', {"detect_timestamp": True, "none_handler": "false"})
+            ]
+            outputs = converter.dump_all(obj, targets, src_fmt=src)
+            self.assertEqual(obj, snapshot)
+            for (fmt, options), output in zip(targets, outputs):
+                self.assertEqual(output, converter.convert(data, src, fmt, **options))
+
+    def test_dump(self):
+        """Test that dumping to a file handle matches dumping to a string."""
+
+        obj = converter.loads(JSON_SOURCE, 'json', convert=False)
+        obj['text'] = 'é 中文 \U0001F600'
+        for fmt in converter.FORMATS:
+            fp = io.BytesIO()
+            converter.dump(obj, fmt, fp, src_fmt='json')
+            output = converter.dumps(obj, fmt, src_fmt='json')
+            self.assertEqual(fp.getvalue(), output if fmt == 'bplist' else output.encode('utf-8'))
+            self.assertEqual(converter.loads(fp.getvalue(), fmt)['text'], obj['text'])
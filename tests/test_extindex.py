@@ -0,0 +1,50 @@
+"""Test extension indexes."""
+import re
+import unittest
+from lib.extindex import SuffixIndex
+
+TABLE = [
+    {"json": "tmLanguage.JSON", "plist": "tmLanguage"},
+    {"json": "JSON", "plist": "plist"},
+    {"json": "tmTheme.JSON", "plist": "tmTheme"}
+]
+
+
+def match_table(filename, src, out):
+    """Match the table the way the extension tables used to be matched."""
+
+    for ext in TABLE:
+        m = re.match("^(.*)\\." + re.escape(ext[src]) + "$", filename, re.IGNORECASE)
+        if m is not None:
+            return m.group(1), ext[out]
+    return None
+
+
+class TestSuffixIndex(unittest.TestCase):
+    """Test extension indexes."""
+
+    def test_match(self):
+        """Test that the index matches like the extension tables."""
+
+        index = SuffixIndex((ext["json"], ext["plist"]) for ext in TABLE)
+        for filename in (
+            "/a.b/foo.tmLanguage.JSON", "foo.TMLANGUAGE.json", "foo.json", "foo.tmTheme.JSON",
+            ".JSON", "foo.JSON.txt", "foo", "foo.xJSON", "/a.JSON/foo"
+        ):
+            self.assertEqual(index.match(filename), match_table(filename, "json", "plist"), filename)
+
+    def test_first_wins(self):
+        """Test that the first matching entry wins."""
+
+        index = SuffixIndex([("JSON", 1), ("tmLanguage.JSON", 2), ("json", 3)])
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.match("foo.tmLanguage.JSON"), ("foo.tmLanguage", 1))
+
+    def test_leading_dot(self):
+        """Test that a leading dot on an extension is ignored."""
+
+        index = SuffixIndex([(".tmLanguage.JSON", 1), ("JSON", 2)])
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.match("foo.tmLanguage.json"), ("foo", 1))
+        self.assertEqual(index.match("foo.JSON"), ("foo", 2))
+        self.assertEqual(SuffixIndex([(".JSON", 1), ("json", 2)]).match("foo.json"), ("foo", 1))
@@ -0,0 +1,122 @@
+"""Test file writing."""
+import unittest
+import os
+import shutil
+import tempfile
+from lib import fileio
+
+
+class TestWriteFile(unittest.TestCase):
+    """Test file writing."""
+
+    def setUp(self):
+        """Setup a temporary folder."""
+
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'test.plist')
+
+    def tearDown(self):
+        """Remove the temporary folder."""
+
+        shutil.rmtree(self.directory)
+
+    def test_write(self):
+        """Test writing strings and bytes."""
+
+        self.assertTrue(fileio.write_file(self.filename, 'é', compare=True))
+        with open(self.filename, 'rb') as f:
+            self.assertEqual(f.read(), 'é'.encode('utf-8'))
+
+    def test_unchanged(self):
+        """Test that unchanged files are not rewritten."""
+
+        fileio.write_file(self.filename, b'abc')
+        os.utime(self.filename, (0, 0))
+        self.assertFalse(fileio.write_file(self.filename, b'abc', compare=True))
+        self.assertEqual(os.path.getmtime(self.filename), 0)
+        self.assertTrue(fileio.write_file(self.filename, b'abd', compare=True))
+        self.assertTrue(fileio.write_file(self.filename, b'abcd', compare=True))
+        self.assertTrue(fileio.write_file(self.filename, b'abcd'))
+
+    def test_is_unchanged_chunks(self):
+        """Test comparing content larger than a chunk."""
+
+        data = os.urandom(fileio.CHUNK_SIZE + 10)
+        fileio.write_file(self.filename, data)
+        self.assertTrue(fileio.is_unchanged(self.filename, data))
+        self.assertFalse(fileio.is_unchanged(self.filename, data[:-1] + b'x'))
+        self.assertFalse(fileio.is_unchanged(os.path.join(self.directory, 'missing'), data))
+
+    def test_write_stream(self):
+        """Test writing a file from a stream."""
+
+        self.assertTrue(fileio.write_stream(self.filename, lambda f: f.write(b'abc')))
+        os.chmod(self.filename, 0o640)
+        os.utime(self.filename, (0, 0))
+        self.assertFalse(fileio.write_stream(self.filename, lambda f: f.write(b'abc'), compare=True))
+        self.assertEqual(os.path.getmtime(self.filename), 0)
+        self.assertTrue(fileio.write_stream(self.filename, lambda f: f.write(b'abcd'), compare=True))
+        with open(self.filename, 'rb') as f:
+            self.assertEqual(f.read(), b'abcd')
+        self.assertEqual(os.stat(self.filename).st_mode & 0o777, 0o640)
+
+    def test_write_stream_error(self):
+        """Test that a failed stream leaves the file as it was."""
+
+        fileio.write_file(self.filename, b'abc')
+
+        def dump(f):
+            f.write(b'partial')
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            fileio.write_stream(self.filename, dump)
+        with open(self.filename, 'rb') as f:
+            self.assertEqual(f.read(), b'abc')
+        self.assertEqual(os.listdir(self.directory), ['test.plist'])
+
+    def test_stage_stream(self):
+        """Test that staged output only replaces the file when committed."""
+
+        fileio.write_file(self.filename, b'abc')
+        tmp = fileio.stage_stream(self.filename, lambda f: f.write(b'new'))
+        with open(self.filename, 'rb') as f:
+            self.assertEqual(f.read(), b'abc')
+        fileio.discard_stream(tmp)
+        self.assertEqual(os.listdir(self.directory), ['test.plist'])
+
+        tmp = fileio.stage_stream(self.filename, lambda f: f.write(b'new'))
+        fileio.commit_stream(tmp, self.filename)
+        with open(self.filename, 'rb') as f:
+            self.assertEqual(f.read(), b'new')
+        self.assertEqual(os.listdir(self.directory), ['test.plist'])
+
+    def test_stage_stream_compare(self):
+        """Test that nothing is created next to an unchanged file, and that changes are staged in full."""
+
+        data = os.urandom(fileio.CHUNK_SIZE + 10)
+        fileio.write_file(self.filename, data)
+
+        def dump(output):
+            def run(f):
+                for start in range(0, len(output), 1000):
+                    f.write(output[start:start + 1000])
+                    self.assertEqual(f.tell(), min(start + 1000, len(output)))
+                    if output == data:
+                        self.assertEqual(os.listdir(self.directory), ['test.plist'])
+            return run
+
+        self.assertIsNone(fileio.stage_stream(self.filename, dump(data), compare=True))
+        self.assertEqual(os.listdir(self.directory), ['test.plist'])
+        for output in (data[:-1] + b'x', data[:-1], data + b'x', b'', b'x' + data[1:]):
+            tmp = fileio.stage_stream(self.filename, dump(output), compare=True)
+            with open(tmp, 'rb') as f:
+                self.assertEqual(f.read(), output)
+            fileio.discard_stream(tmp)
+        self.assertEqual(os.listdir(self.directory), ['test.plist'])
+
+        missing = os.path.join(self.directory, 'missing.plist')
+        tmp = fileio.stage_stream(missing, dump(b'abc'), compare=True)
+        with open(tmp, 'rb') as f:
+            self.assertEqual(f.read(), b'abc')
+        fileio.discard_stream(tmp)
@@ -0,0 +1,94 @@
+"""Test conversion jobs and cancellation."""
+import unittest
+import io
+from lib import converter
+from lib import jobs
+from lib.transform import CHECK_INTERVAL
+
+
+class TestJobs(unittest.TestCase):
+    """Test conversion jobs and cancellation."""
+
+    def make_job(self, owner=None):
+        """Make a job."""
+
+        return jobs.ConversionJob('json', 'yaml', '{}', owner=owner)
+
+    def test_stages(self):
+        """Test that jobs move through their stages until they are cancelled."""
+
+        job = self.make_job()
+        self.assertIsNone(job.stage)
+        job.set_stage('parsing')
+        self.assertEqual(job.stage, 'parsing')
+        job.set_stage('converting')
+        self.assertEqual(job.stage, 'converting')
+
+        job.cancel()
+        self.assertTrue(job.cancelled)
+        with self.assertRaises(jobs.JobCancelled):
+            job.set_stage('writing')
+        self.assertEqual(job.stage, 'converting')
+
+    def test_check(self):
+        """Test that `check` only raises once the job is cancelled."""
+
+        job = self.make_job()
+        job.check()
+        job.cancel()
+        with self.assertRaises(jobs.JobCancelled):
+            job.check()
+
+    def test_cancel_all(self):
+        """Test cancelling registered jobs, or just the ones of an owner."""
+
+        first = self.make_job(owner=1)
+        second = self.make_job(owner=2)
+        jobs.register(first)
+        jobs.register(second)
+        try:
+            self.assertTrue(jobs.has_jobs())
+            self.assertEqual(jobs.cancel_all(owner=1), 1)
+            self.assertTrue(first.cancelled)
+            self.assertFalse(second.cancelled)
+            self.assertEqual(jobs.cancel_all(), 2)
+            self.assertTrue(second.cancelled)
+        finally:
+            jobs.unregister(first)
+            jobs.unregister(second)
+        self.assertFalse(jobs.has_jobs())
+
+    def test_cancel_during_conversion(self):
+        """Test that long reads and dumps stop once their job is cancelled."""
+
+        obj = {"items": [{"name": "item %d" % i, "tags": ["a", "b"]} for i in range(CHECK_INTERVAL * 4)]}
+        sources = {fmt: converter.dumps(obj, fmt) for fmt in converter.FORMATS}
+
+        for fmt in converter.FORMATS:
+            for run in (
+                lambda check: converter.loads(sources[fmt], fmt, check=check),
+                lambda check: converter.dumps(obj, fmt, check=check),
+                lambda check: converter.dump(obj, fmt, io.BytesIO(), check=check)
+            ):
+                job = self.make_job()
+                calls = []
+
+                def check():
+                    # Cancel the job from within the conversion the first time it checks.
+                    calls.append(1)
+                    job.cancel()
+                    job.check()
+
+                with self.assertRaises(jobs.JobCancelled, msg=fmt):
+                    run(check)
+                self.assertEqual(len(calls), 1)
+
+    def test_check_not_cancelled(self):
+        """Test that checks don't change the output of conversions that are not cancelled."""
+
+        job = self.make_job()
+        obj = {"a": [1, 2.5, "text", True, None], "b": {"c": b"data"}}
+        for fmt in ('json', 'yaml'):
+            self.assertEqual(converter.dumps(obj, fmt, check=job.check), converter.dumps(obj, fmt))
+            text = converter.dumps(obj, fmt)
+            self.assertEqual(converter.loads(text, fmt, check=job.check), converter.loads(text, fmt))
@@ -0,0 +1,41 @@
+"""Test JSON sanitizing."""
+import unittest
+import json
+from lib.file_strip.json import sanitize_json, strip_comments, strip_dangling_commas
+
+SOURCES = (
+    '{"a": [1, 2, /* c */ ], // x\n "b": "//not, ]", \'c\': 1,\n}',
+    '[1,\n // c\n /* d\n e */ ]',
+    '{"a": "x\\"//", "b": 3 /**/,}',
+    '{"u": "http://x/*y*/", "v": [ , ]}',
+    '{"a": [1, // see [1]\n 2]}',
+    '{"a": {"b": 1, // }\r\n "c": 2}, /* ] */ "d": [3, // ,]\n]}'
+)
+
+
+class TestSanitize(unittest.TestCase):
+    """Test JSON sanitizing."""
+
+    def test_matches_two_pass(self):
+        """Test that the single pass sanitizer matches stripping comments and then commas."""
+
+        for text in SOURCES:
+            self.assertEqual(
+                sanitize_json(text, True),
+                strip_dangling_commas(strip_comments(text, True), True)
+            )
+
+    def test_preserve_lines(self):
+        """Test that lines are preserved."""
+
+        for text in SOURCES:
+            self.assertEqual(sanitize_json(text, True).count('\n'), text.count('\n'))
+
+    def test_loads(self):
+        """Test that sanitized JSON loads."""
+
+        self.assertEqual(
+            json.loads(sanitize_json('{"a": [1, 2,], // x\n "b": "//, ]",}')),
+            {"a": [1, 2], "b": "//, ]"}
+        )
+        self.assertEqual(json.loads(sanitize_json('{"a": [1, // see [1]\n 2]}')), {"a": [1, 2]})
@@ -0,0 +1,156 @@
+"""Test PLIST helpers."""
+import unittest
+import collections
+import datetime
+import os
+import plistlib
+import tempfile
+from lib import plist_includes as plist
+from lib import bplist
+from lib import xmlplist
+
+SAMPLE = collections.OrderedDict([
+    ("name", "Test"),
+    ("unicode", "\u00e9\u4e2d"),
+    ("ints", [0, 1, 255, 256, 65536, 2 ** 40, -1, -(2 ** 40)]),
+    ("real", 1.5),
+    ("bool", [True, False]),
+    ("date", datetime.datetime(2015, 1, 2, 3, 4, 5)),
+    ("data", b"Some data"),
+    ("uid", plistlib.UID(3)),
+    ("nested", [collections.OrderedDict([("z", "Test"), ("a", [[], {}])])] * 3),
+    ("wide", list(range(300)))
+])
+
+
+def to_hex_view(data):
+    """Format bytes like a Sublime hex view one byte at a time."""
+
+    text = []
+    for count, b in enumerate(data):
+        if count % 16 == 0 and count != 0:
+            text.append('\n')
+        elif count % 2 == 0 and count != 0:
+            text.append(' ')
+        text.append("%02x" % b)
+    return ''.join(text)
+
+
+class TestHex(unittest.TestCase):
+    """Test hex view conversion."""
+
+    def test_from_hex(self):
+        """Test decoding hex view text."""
+
+        data = bytes(range(256)) * 3 + b'\x01'
+        self.assertEqual(plist.convert_from_hex(to_hex_view(data)), data)
+
+    def test_from_hex_chunks(self):
+        """Test decoding hex view text in chunks that split hex pairs."""
+
+        data = bytes(range(256)) * 3 + b'\x01'
+        text = to_hex_view(data)
+        for size in (1, 3, 7, 40, 1000):
+            chunks = (text[i:i + size] for i in range(0, len(text), size))
+            self.assertEqual(plist.convert_from_hex(chunks), data)
+
+    def test_to_hex(self):
+        """Test formatting bytes as hex view text."""
+
+        for data in (b'', b'\x01', bytes(range(16)), bytes(range(256)) * 3 + b'\x01'):
+            self.assertEqual(''.join(plist.convert_to_hex(data)), to_hex_view(data))
+
+    def test_to_hex_chunks(self):
+        """Test formatting bytes as hex view text in chunks."""
+
+        data = bytes(range(256)) * 3 + b'\x01'
+        for size in (1, 40, 100, 1000):
+            self.assertEqual(''.join(plist.convert_to_hex(data, size)), to_hex_view(data))
+
+
+class TestBinaryPlist(unittest.TestCase):
+    """Test the binary PLIST reader."""
+
+    def test_parse(self):
+        """Test that the reader matches plistlib."""
+
+        data = plistlib.dumps(SAMPLE, fmt=plistlib.FMT_BINARY, sort_keys=False)
+        obj = bplist.BinaryPlistReader(data).parse()
+        self.assertEqual(obj, plistlib.loads(data))
+        self.assertEqual(list(obj.keys()), list(SAMPLE.keys()))
+
+    def test_read_file(self):
+        """Test reading a binary PLIST file through a memory map."""
+
+        fd, filename = tempfile.mkstemp(suffix='.plist')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(plistlib.dumps(SAMPLE, fmt=plistlib.FMT_BINARY, sort_keys=False))
+            self.assertEqual(bplist.read_binary_plist(filename), SAMPLE)
+        finally:
+            os.remove(filename)
+
+    def test_invalid(self):
+        """Test invalid binary PLISTs."""
+
+        data = plistlib.dumps(SAMPLE, fmt=plistlib.FMT_BINARY)
+        for bad in (b'bplist00', b'not a plist' * 10, data[:-40] + data[-32:]):
+            with self.assertRaises(plistlib.InvalidFileException):
+                bplist.BinaryPlistReader(bad).parse()
+
+
+class TestXmlPlist(unittest.TestCase):
+    """Test the XML PLIST reader."""
+
+    def sample(self):
+        """Get the sample without the values XML PLISTs can't hold."""
+
+        sample = collections.OrderedDict(SAMPLE)
+        del sample["uid"]
+        return sample
+
+    def test_parse(self):
+        """Test that the reader matches plistlib in chunks of any size."""
+
+        data = plistlib.dumps(self.sample(), sort_keys=False)
+        text = data.decode('utf-8')
+        for size in (1, 7, 100, 1024 * 1024):
+            for source in (data, text):
+                chunks = (source[i:i + size] for i in range(0, len(source), size))
+                obj = xmlplist.read_xml_plist(chunks)
+                self.assertEqual(obj, plistlib.loads(data))
+                self.assertEqual(list(obj.keys()), list(self.sample().keys()))
+
+    def test_comments(self):
+        """Test that comments are ignored."""
+
+        data = (
+            '<?xml version="1.0" encoding="UTF-8"?>\n<!-- header -->\n<plist version="1.0">\n'
+            '<dict><!-- <key>no</key> --><key>a</key><!-- c --><string>x<!-- c -->y</string>'
+            '<key>b</key><array><integer>0x10</integer><!-- c --><real>1.5</real></array></dict>\n</plist>\n'
+        )
+        self.assertEqual(plist.plist_loads(data), {"a": "xy", "b": [16, 1.5]})
+
+    def test_read_file(self):
+        """Test reading an XML PLIST file."""
+
+        fd, filename = tempfile.mkstemp(suffix='.plist')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(plistlib.dumps(self.sample(), sort_keys=False))
+            self.assertEqual(plist.read_plist_from_file(filename), self.sample())
+        finally:
+            os.remove(filename)
+
+    def test_invalid(self):
+        """Test invalid XML PLISTs."""
+
+        for bad in (
+            '<plist><dict><string>a</string></dict></plist>',
+            '<plist><dict><key>a</key></dict></plist>',
+            '<plist><array><key>a</key></array></plist>',
+            '<plist></plist>',
+            '<!DOCTYPE plist [<!ENTITY a "aaaa">]><plist><string>&a;</string></plist>'
+        ):
+            with self.assertRaises((ValueError, plistlib.InvalidFileException)):
+                xmlplist.read_xml_plist(bad)
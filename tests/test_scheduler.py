@@ -0,0 +1,150 @@
+"""Test the conversion scheduler."""
+import threading
+import unittest
+from lib.scheduler import Scheduler
+
+TIMEOUT = 5
+
+
+class TestScheduler(unittest.TestCase):
+    """Test the conversion scheduler."""
+
+    def test_coalesce(self):
+        """Test that waiting tasks for a running key are replaced by newer ones."""
+
+        scheduler = Scheduler(2)
+        release = threading.Event()
+        started = threading.Event()
+        done = threading.Event()
+        ran = []
+        dropped = []
+
+        def first():
+            started.set()
+            release.wait(TIMEOUT)
+            ran.append(1)
+
+        scheduler.submit("a.plist", first)
+        self.assertTrue(started.wait(TIMEOUT))
+        scheduler.submit("a.plist", lambda: ran.append(2), lambda: dropped.append(2))
+        scheduler.submit("a.plist", lambda: (ran.append(3), done.set()), lambda: dropped.append(3))
+        self.assertEqual(scheduler.pending(), 1)
+        release.set()
+        self.assertTrue(done.wait(TIMEOUT))
+        self.assertEqual(ran, [1, 3])
+        self.assertEqual(dropped, [2])
+
+    def test_worker_limit(self):
+        """Test that different keys run concurrently up to the worker limit."""
+
+        scheduler = Scheduler(2)
+        release = threading.Event()
+        lock = threading.Lock()
+        running = []
+        peak = []
+        finished = threading.Semaphore(0)
+
+        def task(name):
+            def run():
+                with lock:
+                    running.append(name)
+                    peak.append(len(running))
+                release.wait(TIMEOUT)
+                with lock:
+                    running.remove(name)
+                finished.release()
+            return run
+
+        for name in ("a", "b", "c"):
+            scheduler.submit(name, task(name))
+        self.assertEqual(scheduler.pending(), 1)
+        release.set()
+        for _ in range(3):
+            self.assertTrue(finished.acquire(timeout=TIMEOUT))
+        self.assertEqual(max(peak), 2)
+        self.assertEqual(scheduler.pending(), 0)
+
+    def test_several_keys(self):
+        """Test that a task with several keys waits for and holds each of its keys."""
+
+        scheduler = Scheduler(4)
+        release = threading.Event()
+        started = threading.Event()
+        done = threading.Event()
+        lock = threading.Lock()
+        ran = []
+
+        def task(name, event=None):
+            def run():
+                with lock:
+                    ran.append(name)
+                if event is not None:
+                    event.set()
+                    release.wait(TIMEOUT)
+            return run
+
+        def last():
+            with lock:
+                ran.append("c")
+            done.set()
+
+        scheduler.submit("a.plist", task("a", started))
+        self.assertTrue(started.wait(TIMEOUT))
+        scheduler.submit(["a.plist", "b.plist"], task("group"))
+        scheduler.submit("b.plist", last)
+        # The group waits on `a.plist` and `b.plist` waits behind the group.
+        self.assertEqual(scheduler.pending(), 2)
+        self.assertEqual(ran, ["a"])
+        release.set()
+        self.assertTrue(done.wait(TIMEOUT))
+        self.assertEqual(ran, ["a", "group", "c"])
+
+    def test_several_keys_coalesce(self):
+        """Test that a waiting task with several keys is only replaced by a task with the same keys."""
+
+        scheduler = Scheduler(2)
+        release = threading.Event()
+        started = threading.Event()
+        dropped = []
+
+        def first():
+            started.set()
+            release.wait(TIMEOUT)
+
+        scheduler.submit("a.plist", first)
+        self.assertTrue(started.wait(TIMEOUT))
+        scheduler.submit(["a.plist", "b.plist"], lambda: None, lambda: dropped.append(1))
+        scheduler.submit(["b.plist", "a.plist"], lambda: None, lambda: dropped.append(2))
+        scheduler.submit("b.plist", lambda: None, lambda: dropped.append(3))
+        self.assertEqual(dropped, [1])
+        self.assertEqual(scheduler.pending(), 2)
+        release.set()
+
+    def test_hold(self):
+        """Test that a task submitted with `hold` keeps its key until it is released."""
+
+        scheduler = Scheduler(2)
+        done = threading.Event()
+        ran = []
+
+        scheduler.submit("a.plist", lambda: ran.append(1), hold=True)
+        scheduler.submit("a.plist", lambda: (ran.append(2), done.set()))
+        self.assertFalse(done.wait(0.2))
+        self.assertEqual(ran, [1])
+        self.assertEqual(scheduler.pending(), 1)
+        scheduler.release("a.plist")
+        self.assertTrue(done.wait(TIMEOUT))
+        self.assertEqual(ran, [1, 2])
+
+    def test_hold_failed(self):
+        """Test that a held task that fails releases its keys."""
+
+        scheduler = Scheduler(2)
+        done = threading.Event()
+
+        def fail():
+            raise ValueError
+
+        scheduler.submit(["a.plist", "b.plist"], fail, hold=True)
+        scheduler.submit("b.plist", done.set)
+        self.assertTrue(done.wait(TIMEOUT))
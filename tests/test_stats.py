@@ -0,0 +1,83 @@
+"""Test conversion statistics."""
+import unittest
+import os
+import shutil
+import tempfile
+from lib.stats import ConversionStats, bucket_index, bucket_limit
+
+
+class TestStats(unittest.TestCase):
+    """Test conversion statistics."""
+
+    def test_buckets(self):
+        """Test that latencies fall within their bucket."""
+
+        for seconds in (0.00001, 0.0001, 0.00015, 0.01, 1.5, 120.0):
+            index = bucket_index(seconds)
+            self.assertLessEqual(seconds, bucket_limit(index) * 1.000001)
+            if index:
+                self.assertGreater(seconds, bucket_limit(index - 1))
+
+    def test_record(self):
+        """Test counting conversions by direction and trigger."""
+
+        stats = ConversionStats()
+        stats.record('json_to_yaml', 'command', 0.1, 10, 20)
+        stats.record('json_to_yaml', 'command', 0.2, 10, 20, 'cached')
+        stats.record('json_to_yaml', 'convert_on_save', 0.3, 5, 0, 'failed')
+
+        group = stats.groups[('json_to_yaml', 'command')]
+        self.assertEqual(group['count'], 2)
+        self.assertEqual(group['cached'], 1)
+        self.assertEqual(group['bytes_in'], 20)
+        self.assertEqual(group['bytes_out'], 40)
+        self.assertEqual(stats.groups[('json_to_yaml', 'convert_on_save')]['failed'], 1)
+
+    def test_percentiles(self):
+        """Test that percentiles are within a bucket of the real value."""
+
+        stats = ConversionStats()
+        for i in range(1, 101):
+            stats.record('yaml_to_plist', 'command', i / 100.0)
+        group = stats.groups[('yaml_to_plist', 'command')]
+
+        for percent in (50, 95, 99):
+            value = stats.percentile(group, percent)
+            self.assertGreaterEqual(value, percent / 100.0)
+            self.assertLessEqual(value, percent / 100.0 * 1.2)
+        self.assertEqual(stats.percentile(group, 100), 1.0)
+
+    def test_persist(self):
+        """Test that saved statistics are added to the current ones."""
+
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, 'stats.json')
+            stats = ConversionStats()
+            stats.record('plist_to_json', 'command', 0.5, 100, 200)
+            stats.save(filename)
+
+            loaded = ConversionStats()
+            loaded.record('plist_to_json', 'command', 2.0, 1, 2)
+            self.assertTrue(loaded.load(filename))
+            self.assertFalse(loaded.load(os.path.join(directory, 'missing.json')))
+        finally:
+            shutil.rmtree(directory)
+
+        group = loaded.groups[('plist_to_json', 'command')]
+        self.assertEqual(group['count'], 2)
+        self.assertEqual(group['bytes_in'], 101)
+        self.assertEqual(group['max'], 2.0)
+        self.assertEqual(sum(group['histogram'].values()), 2)
+
+    def test_report(self):
+        """Test the statistics table."""
+
+        stats = ConversionStats()
+        self.assertEqual(stats.report(), "No conversions recorded.\n")
+        stats.record('json_to_bplist', 'convert_on_save', 0.25, 2048, 1024)
+        lines = stats.report().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('p99', lines[0])
+        self.assertTrue(lines[1].startswith('json_to_bplist'))
+        self.assertIn('2.0KB', lines[1])
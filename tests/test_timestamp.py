@@ -0,0 +1,34 @@
+"""Test timestamp detection."""
+import datetime
+import unittest
+from lib import plist_includes as plist
+from lib import yaml_includes as yaml
+
+NOT_DATES = [
+    "", "Z", "2015", "source.test", "\\b(if|else)\\b", "(?x)^\\s*(\\d{4})-(\\d{2})", "keyword.control.test",
+    "2015-01-02 is a date", "2015-01-02Z and more", "12345-01-02", "abcd-01-02", "2015/01/02"
+]
+
+
+class TestTimestamp(unittest.TestCase):
+    """Test timestamp detection."""
+
+    def test_yaml(self):
+        """Test YAML timestamp detection."""
+
+        self.assertEqual(yaml.convert_timestamp("2015-1-2"), datetime.date(2015, 1, 2))
+        self.assertEqual(
+            yaml.convert_timestamp("2001-12-14t21:59:43.10-05:00"),
+            datetime.datetime(2001, 12, 15, 2, 59, 43, 100000)
+        )
+        self.assertEqual(yaml.convert_timestamp("2015-01-02 03:04:05Z"), datetime.datetime(2015, 1, 2, 3, 4, 5))
+        for text in NOT_DATES:
+            self.assertIsNone(yaml.convert_timestamp(text), text)
+
+    def test_plist(self):
+        """Test PLIST date detection."""
+
+        self.assertEqual(plist.convert_timestamp("2015Z"), datetime.datetime(2015, 1, 1))
+        self.assertEqual(plist.convert_timestamp("2015-01-02T03:04:05Z"), datetime.datetime(2015, 1, 2, 3, 4, 5))
+        for text in NOT_DATES:
+            self.assertIsNone(plist.convert_timestamp(text), text)
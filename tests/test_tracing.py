@@ -0,0 +1,82 @@
+"""Test conversion tracing."""
+import unittest
+import io
+import json
+import os
+import tempfile
+from lib import converter
+from lib import log
+from lib.tracing import Tracer, NULL_TRACER, count_objects
+
+
+class TestTracing(unittest.TestCase):
+    """Test conversion tracing."""
+
+    def test_count_objects(self):
+        """Test counting the nodes of a tree."""
+
+        self.assertEqual(count_objects(1), 1)
+        self.assertEqual(count_objects({"a": [1, 2, {"b": None}], "c": "d"}), 7)
+
+    def test_stages(self):
+        """Test that the converter records its stages."""
+
+        tracer = Tracer("test")
+        obj = converter.loads('{"a": [1, 2], // comment\n}', 'json', convert=False, tracer=tracer)
+        output = converter.dumps(obj, 'yaml', src_fmt='json', tracer=tracer)
+        converter.dump(obj, 'bplist', io.BytesIO(), src_fmt='json', tracer=tracer)
+
+        stages = tracer.to_dict()["stages"]
+        self.assertEqual([stage["name"] for stage in stages], ['sanitize', 'parse', 'dump', 'dump'])
+        self.assertEqual(stages[1]["objects"], 4)
+        self.assertEqual(stages[2]["output"], len(output))
+        self.assertTrue(all(stage["time"] >= 0 for stage in stages))
+
+    def test_iterate(self):
+        """Test timing an iterable as a stage."""
+
+        tracer = Tracer("test")
+        self.assertEqual(list(tracer.iterate("hex", ["ab", "cde"])), ["ab", "cde"])
+        self.assertEqual(tracer.stages[0]["name"], "hex")
+        self.assertEqual(tracer.stages[0]["output"], 5)
+
+    def test_null_tracer(self):
+        """Test that nothing is recorded when tracing is disabled."""
+
+        converter.loads('{"a": 1}', 'json', tracer=NULL_TRACER)
+        with NULL_TRACER.stage('test') as record:
+            record['output'] = 1
+        self.assertEqual(list(NULL_TRACER.iterate('test', [1])), [1])
+        self.assertEqual(NULL_TRACER.stages, ())
+
+    def test_summary(self):
+        """Test the one line summary."""
+
+        tracer = Tracer("JSON to YAML", cached=True, file=None)
+        with tracer.stage('parse', source=2048) as record:
+            record['objects'] = 3
+        summary = tracer.summary()
+        self.assertTrue(summary.startswith("JSON to YAML (cached): "))
+        self.assertIn("parse ", summary)
+        self.assertIn("(2.0KB 3 objects)", summary)
+        self.assertNotIn("\n", summary)
+
+    def test_log(self):
+        """Test appending traces to a JSON lines log."""
+
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            for name in ("first", "second"):
+                tracer = Tracer(name, file="test.json")
+                with tracer.stage('parse'):
+                    pass
+                log.trace_msg(tracer, filename)
+            with open(filename, 'r', encoding='utf-8') as f:
+                traces = [json.loads(line) for line in f]
+        finally:
+            os.remove(filename)
+
+        self.assertEqual([trace["name"] for trace in traces], ["first", "second"])
+        self.assertEqual(traces[0]["file"], "test.json")
+        self.assertEqual(traces[0]["stages"][0]["name"], "parse")
@@ -0,0 +1,113 @@
+"""Test tree transforms."""
+import unittest
+import collections
+from lib.transform import transform, compose, pipeline, DROP
+from lib import plist_includes as plist
+
+
+def make_deep(depth):
+    """Make a deeply nested tree."""
+
+    root = node = collections.OrderedDict()
+    for _ in range(depth):
+        child = collections.OrderedDict()
+        node["child"] = [child]
+        node = child
+    node["value"] = None
+    return root
+
+
+class TestTransform(unittest.TestCase):
+    """Test tree transforms."""
+
+    def test_convert(self):
+        """Test converting and dropping nodes."""
+
+        tree = {"a": [1, None, 2, {"b": None, "c": 3}], "d": None}
+        result = transform(tree, lambda n: DROP if n is None else (n * 10 if isinstance(n, int) else n))
+        self.assertEqual(result, {"a": [10, 20, {"c": 30}]})
+
+    def test_not_mutated(self):
+        """Test that the original tree is left untouched."""
+
+        tree = {"a": [1, None, 2]}
+        plist.plist_convert_to(tree, none_handler="strip")
+        self.assertEqual(tree, {"a": [1, None, 2]})
+
+    def test_shared(self):
+        """Test that only containers on the way to a changed node are copied."""
+
+        unchanged = {"b": [1, 2], "c": {"d": "x"}}
+        tree = {"a": [1, None, 2], "e": unchanged, "f": [{"g": None}, [3]]}
+        self.assertIs(transform(tree, lambda n: n), tree)
+
+        result = plist.plist_convert_to(tree, none_handler="false")
+        self.assertEqual(result, {"a": [1, False, 2], "e": unchanged, "f": [{"g": False}, [3]]})
+        self.assertIsNot(result, tree)
+        self.assertIsNot(result["a"], tree["a"])
+        self.assertIs(result["e"], unchanged)
+        self.assertIsNot(result["f"], tree["f"])
+        self.assertIs(result["f"][1], tree["f"][1])
+        self.assertEqual(tree["a"], [1, None, 2])
+
+    def test_changed_prefix(self):
+        """Test that items before the first change are kept in order when a container is copied."""
+
+        tree = collections.OrderedDict([("z", 1), ("y", [1]), ("x", None), ("w", 2)])
+        result = plist.plist_convert_to(tree, none_handler="strip")
+        self.assertIsInstance(result, collections.OrderedDict)
+        self.assertEqual(list(result.items()), [("z", 1), ("y", [1]), ("w", 2)])
+        self.assertIs(result["y"], tree["y"])
+        self.assertEqual(transform([[1], [None], [2]], lambda n: DROP if n is None else n), [[1], [], [2]])
+
+    def test_order(self):
+        """Test that dictionary order is preserved."""
+
+        tree = collections.OrderedDict([("z", 1), ("a", [collections.OrderedDict([("y", 2), ("b", 3)])])])
+        result = transform(tree, lambda n: n)
+        self.assertIsInstance(result, collections.OrderedDict)
+        self.assertEqual(list(result.keys()), ["z", "a"])
+        self.assertEqual(list(result["a"][0].keys()), ["y", "b"])
+
+    def test_deep(self):
+        """Test that deep trees don't hit the recursion limit."""
+
+        result = plist.plist_convert_to(make_deep(20000), none_handler="false")
+        for _ in range(20000):
+            result = result["child"][0]
+        self.assertIs(result["value"], False)
+
+    def test_wide_strip(self):
+        """Test stripping `None` from wide arrays."""
+
+        tree = [None if i % 2 else i for i in range(100000)]
+        self.assertEqual(plist.plist_convert_to(tree, none_handler="strip"), list(range(0, 100000, 2)))
+
+    def test_circular(self):
+        """Test that circular references are detected."""
+
+        tree = {"a": []}
+        tree["a"].append(tree)
+        with self.assertRaises(ValueError):
+            transform(tree, lambda n: n)
+
+    def test_compose(self):
+        """Test composing steps into a single walk."""
+
+        calls = []
+
+        def count(node):
+            calls.append(node)
+            return node
+
+        convert = compose(None, lambda n: DROP if n is None else n, count)
+        self.assertEqual(transform([1, None, [2]], convert), [1, [2]])
+        # Dropped nodes are not passed to later steps.
+        self.assertEqual(calls, [[1, None, [2]], 1, [2], 2])
+
+    def test_pipeline_no_steps(self):
+        """Test that a pipeline with no steps does not walk the tree."""
+
+        tree = {"a": [1]}
+        self.assertIs(pipeline(tree, None, None), tree)
+        self.assertIsNone(compose())